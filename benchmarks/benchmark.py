@@ -0,0 +1,193 @@
+"""
+Benchmarks of the parse, validate and serialize paths of hsmodels over the test fixtures.
+
+Every fixture in tests/data/metadata is run through load_rdf, parse_file, rdf_graph, rdf_string and model_dump and
+every fixture in tests/data/json through model_validate and validate_many. Each case reports ops/sec, per call latency
+percentiles and the memory a call allocates, as traced by tracemalloc.
+
+    python benchmarks/benchmark.py --output before.json
+    python benchmarks/benchmark.py --output after.json --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from importlib.metadata import PackageNotFoundError, version
+
+root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# the checkout is benchmarked, whether or not hsmodels is installed
+sys.path.insert(0, root_dir)
+
+from hsmodels.schemas import load_rdf, parse_file, rdf_graph, rdf_string, user_schemas, validate_many
+from hsmodels.schemas.aggregations import (
+    CSVFileMetadataIn,
+    FileSetMetadataIn,
+    GeographicFeatureMetadataIn,
+    GeographicRasterMetadataIn,
+    ModelInstanceMetadataIn,
+    ModelProgramMetadataIn,
+    MultidimensionalMetadataIn,
+    ReferencedTimeSeriesMetadataIn,
+    SingleFileMetadataIn,
+    TimeSeriesMetadataIn,
+)
+from hsmodels.schemas.resource import ResourceMetadataIn
+
+data_dir = os.path.join(root_dir, "tests", "data")
+
+metadata_json_input = [
+    (ResourceMetadataIn, 'resource.json'),
+    (GeographicRasterMetadataIn, 'geographicraster.json'),
+    (GeographicFeatureMetadataIn, 'geographicfeature.json'),
+    (MultidimensionalMetadataIn, 'multidimensional.json'),
+    (ReferencedTimeSeriesMetadataIn, 'referencedtimeseries.refts.json'),
+    (FileSetMetadataIn, 'fileset.json'),
+    (SingleFileMetadataIn, 'singlefile.json'),
+    (TimeSeriesMetadataIn, 'timeseries.json'),
+    (ModelProgramMetadataIn, 'modelprogram.json'),
+    (ModelInstanceMetadataIn, 'modelinstance.json'),
+    (ResourceMetadataIn, 'collection.json'),
+    (ResourceMetadataIn, 'webapp.json'),
+    (CSVFileMetadataIn, 'csvfile.json'),
+]
+
+PERCENTILES = (50, 90, 99)
+
+
+def cases():
+    """Yields (name, callable) for every benchmarked call"""
+    metadata_dir = os.path.join(data_dir, "metadata")
+    rdf_schemas_by_user_schema = {user_schema: rdf_schema for rdf_schema, user_schema in user_schemas.items()}
+    for file_name in sorted(os.listdir(metadata_dir)):
+        path = os.path.join(metadata_dir, file_name)
+        with open(path, "r") as f:
+            rdf_str = f.read()
+        md = load_rdf(rdf_str)
+        rdf_schema = rdf_schemas_by_user_schema[type(md)]
+        yield "load_rdf[{}]".format(file_name), lambda rdf_str=rdf_str: load_rdf(rdf_str)
+        yield "load_rdf(native)[{}]".format(file_name), lambda rdf_str=rdf_str: load_rdf(rdf_str, native=True)
+        yield "parse_file[{}]".format(file_name), lambda path=path, schema=rdf_schema: parse_file(schema, path)
+        yield "rdf_graph[{}]".format(file_name), lambda md=md: rdf_graph(md)
+        yield "rdf_string[{}]".format(file_name), lambda md=md: rdf_string(md)
+        yield "rdf_string(native)[{}]".format(file_name), lambda md=md: rdf_string(md, native=True)
+        yield "model_dump[{}]".format(file_name), lambda md=md: md.model_dump()
+
+    for in_schema, file_name in metadata_json_input:
+        with open(os.path.join(data_dir, "json", file_name), "r") as f:
+            values = json.load(f)
+        yield "model_validate[{}]".format(file_name), lambda schema=in_schema, values=values: schema.model_validate(
+            values
+        )
+        records = [values] * 100
+        yield "validate_many(100)[{}]".format(file_name), lambda schema=in_schema, records=records: validate_many(
+            schema, records
+        )
+
+
+def percentile(ordered, p):
+    """Nearest rank percentile of an ordered list"""
+    index = max(0, -(-len(ordered) * p // 100) - 1)
+    return ordered[int(index)]
+
+
+def measure(func, min_time, min_rounds):
+    func()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < min_rounds or time.perf_counter() - started < min_time:
+        start = time.perf_counter_ns()
+        func()
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        retained, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = {
+        "rounds": len(timings),
+        "ops_per_sec": len(timings) * 1e9 / sum(timings),
+        "mean_us": sum(timings) / len(timings) / 1000,
+    }
+    for p in PERCENTILES:
+        result["p{}_us".format(p)] = percentile(timings, p) / 1000
+    result["peak_bytes"] = peak - before
+    result["retained_bytes"] = retained - before
+    return result
+
+
+def package_version(name):
+    try:
+        return version(name)
+    except PackageNotFoundError:
+        return None
+
+
+def compare(results, baseline):
+    print("\n{:<60} {:>12} {:>12} {:>8}".format("case", "baseline/s", "ops/s", "change"))
+    for name, result in results.items():
+        if name in baseline:
+            before = baseline[name]["ops_per_sec"]
+            after = result["ops_per_sec"]
+            print("{:<60} {:>12.1f} {:>12.1f} {:>7.2f}x".format(name, before, after, after / before))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a JSON file written by an earlier run to compare against")
+    parser.add_argument("--filter", default="", help="only run the cases whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds to run each case for, at least")
+    parser.add_argument("--min-rounds", type=int, default=10, help="calls to time for each case, at least")
+    args = parser.parse_args(argv)
+
+    results = {}
+    print("{:<60} {:>10} {:>10} {:>10} {:>10} {:>12}".format("case", "ops/s", "p50 us", "p90 us", "p99 us", "peak KiB"))
+    for name, func in cases():
+        if args.filter not in name:
+            continue
+        result = results[name] = measure(func, args.min_time, args.min_rounds)
+        print(
+            "{:<60} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f} {:>12.1f}".format(
+                name,
+                result["ops_per_sec"],
+                result["p50_us"],
+                result["p90_us"],
+                result["p99_us"],
+                result["peak_bytes"] / 1024,
+            )
+        )
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "hsmodels": package_version("hsmodels"),
+                "pydantic": package_version("pydantic"),
+                "rdflib": package_version("rdflib"),
+                "min_time": args.min_time,
+                "min_rounds": args.min_rounds,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(results, json.load(f)["results"])
+
+
+if __name__ == "__main__":
+    main()
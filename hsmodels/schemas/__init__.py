@@ -1,9 +1,16 @@
-import inspect
-from enum import Enum
+import logging
+import multiprocessing
+import os
+from copy import copy, deepcopy
+from functools import lru_cache, partial
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from xml.etree.ElementTree import ParseError
 
-from pydantic import AnyUrl, BaseModel
-from pydantic_core import Url
+from pydantic import AfterValidator, BaseModel, Field, PositiveInt, TypeAdapter, ValidationError
+from pydantic_core import from_json
 from rdflib import Graph, Literal, URIRef
+from rdflib.term import Identifier
+from typing_extensions import Annotated
 
 from hsmodels.namespaces import DC, HSTERMS, ORE, RDF, RDFS1
 from hsmodels.schemas.aggregations import (
@@ -18,7 +25,17 @@ from hsmodels.schemas.aggregations import (
     TimeSeriesMetadata,
     CSVFileMetadata,
 )
-from hsmodels.schemas.enums import TermEnum
+from hsmodels.schemas.bag import ExportedFile, bag_files, export_bag
+from hsmodels.schemas.base_models import rdf_cache
+from hsmodels.schemas.cache import CacheInfo, ParseCache
+from hsmodels.schemas.construct import (
+    default_factories,
+    field_line_errors,
+    run_before_field_validators,
+    run_before_validators,
+)
+from hsmodels.schemas.jsonld import jsonld_document, jsonld_string
+from hsmodels.schemas.lazy import LazyMetadata
 from hsmodels.schemas.rdf.aggregations import (
     FileSetMetadataInRDF,
     GeographicFeatureMetadataInRDF,
@@ -31,9 +48,24 @@ from hsmodels.schemas.rdf.aggregations import (
     TimeSeriesMetadataInRDF,
     CSVFileMetadataInRDF,
 )
-from hsmodels.schemas.rdf.resource import CollectionMetadataInRDF, ResourceMap, ResourceMetadataInRDF, WebAppMetadataInRDF
+from hsmodels.schemas.rdf.canonical import canonical_triples, triple_ntriples, write_ntriples
+from hsmodels.schemas.rdf.fields import CoverageInRDF, DateInRDF
+from hsmodels.schemas.rdf.plans import model_plan
+from hsmodels.schemas.rdf.reader import UnsupportedRDFXML, read_rdf_xml
+from hsmodels.schemas.rdf.resource import (
+    BaseResource,
+    CollectionMetadataInRDF,
+    ResourceMap,
+    ResourceMetadataInRDF,
+    WebAppMetadataInRDF,
+    hs_uid,
+)
+from hsmodels.schemas.rdf.validators import coverages_constraint, dates_constraint
+from hsmodels.schemas.rdf.writer import RDFXMLWriter, write_lines, write_rdf_xml
 from hsmodels.schemas.resource import CollectionMetadata, ResourceMetadata, WebAppMetadata
 
+logger = logging.getLogger(__name__)
+
 rdf_schemas = {
     ORE.ResourceMap: ResourceMap,
     HSTERMS.CompositeResource: ResourceMetadataInRDF,
@@ -68,155 +100,632 @@ user_schemas = {
 }
 
 
-def load_rdf(rdf_str, file_format='xml'):
-    g = Graph().parse(data=rdf_str, format=file_format)
-    for target_class, schema in rdf_schemas.items():
-        subject = g.value(predicate=RDF.type, object=target_class)
-        if subject:
-            if target_class == ResourceMap:
-                return _parse(schema, g)
-            else:
-                rdf_metadata = _parse(schema, g)
-                if schema in user_schemas.keys():
-                    return user_schemas[schema](**rdf_metadata.model_dump(exclude_none=True))
-                return rdf_metadata
-    raise Exception("Could not find schema for \n{}".format(rdf_str))
+def load_rdf(rdf_str, file_format='xml', native=False):
+    """
+    Parses an RDF document into the model of its root type.
+
+    :param native: read RDF/XML with the streaming reader in hsmodels.schemas.rdf.reader, documents it does not
+        support are parsed with rdflib
+    """
+    g = _read_graph(data=rdf_str, file_format=file_format, native=native)
+    schema, subject = _match_schema(g)
+    if not schema:
+        raise Exception("Could not find schema for \n{}".format(rdf_str))
+    if schema in user_schemas:
+        return _user_model(schema, _parse(schema, g, subject, as_dict=True))
+    return _parse(schema, g, subject)
+
+
+def load_rdf_lazy(rdf_str, file_format='xml', native=False):
+    """
+    Parses an RDF document like load_rdf, the user model is returned as a LazyMetadata which validates each field,
+    nested models included, on first access. Documents without a user model are returned as load_rdf returns them.
+    """
+    g = _read_graph(data=rdf_str, file_format=file_format, native=native)
+    schema, subject = _match_schema(g)
+    if not schema:
+        raise Exception("Could not find schema for \n{}".format(rdf_str))
+    if schema not in user_schemas:
+        return _parse(schema, g, subject)
+    return LazyMetadata(
+        user_schemas[schema],
+        partial(_rdf_values, schema, g, subject),
+        partial(_lazy_user_model, schema, g, subject),
+    )
+
+
+def _lazy_user_model(rdf_schema, metadata_graph, subject):
+    return _user_model(rdf_schema, _parse(rdf_schema, metadata_graph, subject, as_dict=True))
+
+
+def _rdf_values(rdf_schema, metadata_graph, subject, fields):
+    values = _parse(rdf_schema, metadata_graph, subject, as_dict=True, fields=fields)
+    return _check_rdf_values(rdf_schema, values)
+
+
+class LoadResult(NamedTuple):
+    """The outcome of loading one document with load_rdf_many, error holds the message of a failed load"""
+
+    index: int
+    model: Any
+    error: Optional[str]
+
+
+def load_rdf_many(sources, workers=None, chunksize=16, ordered=True, file_format='xml', native=False):
+    """
+    Loads many RDF documents with load_rdf, spread across a pool of worker processes.
+
+    Yields a LoadResult for each source as the documents are loaded, in the order of sources or, with ordered=False,
+    as soon as each chunk is done. A document that fails to load is reported in its LoadResult and does not stop the
+    others.
+
+    :param sources: an iterable of documents, given as str or bytes, or of file paths given as os.PathLike
+    :param workers: the number of worker processes, defaults to the number of CPUs. 0 loads the documents in this
+        process
+    :param chunksize: the number of documents sent to a worker at a time
+    :param ordered: yield the results in the order of sources
+    """
+    tasks = ((index, source, file_format, native) for index, source in enumerate(sources))
+    if workers == 0:
+        yield from map(_load_document, tasks)
+        return
+    with multiprocessing.Pool(workers) as pool:
+        imap = pool.imap if ordered else pool.imap_unordered
+        yield from imap(_load_document, tasks, chunksize)
+
+
+def _load_document(task):
+    index, source, file_format, native = task
+    try:
+        if isinstance(source, os.PathLike):
+            with open(source, 'rb') as f:
+                source = f.read()
+        if isinstance(source, bytes):
+            source = source.decode('utf-8')
+        return LoadResult(index, load_rdf(source, file_format=file_format, native=native), None)
+    except Exception as e:
+        return LoadResult(index, None, "{}: {}".format(type(e).__name__, e))
+
+
+class ValidationReport(NamedTuple):
+    """The outcome of validate_many"""
+
+    # the model of each record in the order of the records, None for the records failing validation
+    models: List[Any]
+    # the errors of each record failing validation by record index, in the format of ValidationError.errors with
+    # locations relative to the record. Other exceptions are reported with their class name as type
+    errors: Dict[int, List[dict]]
+
+
+def validate_many(model_cls, records):
+    """
+    Validates many records as instances of model_cls in one call into pydantic-core.
+
+    The records are validated as a list by a TypeAdapter cached for model_cls, a record failing validation is kept
+    aside in place of its model rather than failing the list. The records kept aside are then validated together a
+    second time, their errors are taken from the single ValidationError by the index of their record. When a before
+    validator raises an exception other than a ValidationError (a record that is not a mapping, a malformed coverage,
+    ...) the batch falls back to validating the records one by one, reporting the exception of each record. The
+    records are shallow copied first, as model_cls(**record) would, so the before validators do not change them.
+
+    A batch spends most of its time in the Python validators of model_cls, the before validators and the email checks
+    of EmailStr, which run once per record whichever way the records are validated. validate_many saves the calls into
+    pydantic-core and the exceptions of a loop over model_cls(**record), not the work of the validators.
 
+    :param model_cls: the model class, ResourceMetadata or an aggregation metadata class for instance
+    :param records: a list of dictionaries, or a JSON array of objects given as str or bytes
+    :return: a ValidationReport
+    :raises pydantic.ValidationError: when records is not a list or not a JSON array
+    """
+    if isinstance(records, (str, bytes)):
+        # validate_json runs the before validators on the records all the same, and takes longer than from_json and
+        # validate_python do
+        records = from_json(records)
+    try:
+        models = _batch_adapter(model_cls).validate_python(_copy_records(records))
+        failed = [index for index, model in enumerate(models) if not isinstance(model, model_cls)]
+        if not failed:
+            return ValidationReport(models, {})
+        errors = _failed_record_errors(model_cls, [records[index] for index in failed])
+    except ValidationError:
+        # records is not a list
+        raise
+    except Exception:
+        return _validate_one_by_one(model_cls, records)
 
-def parse_file(schema, file, file_format='xml', subject=None):
-    metadata_graph = Graph().parse(file, format=file_format)
+    for index in failed:
+        models[index] = None
+    return ValidationReport(models, {failed[position]: record_errors for position, record_errors in errors.items()})
+
+
+def _copy_records(records):
+    if not isinstance(records, (list, tuple)):
+        # left for the adapter to refuse
+        return records
+    return [dict(record) if isinstance(record, dict) else record for record in records]
+
+
+def _failed_record_errors(model_cls, records):
+    """Returns the errors of records failing validation by their position in records, locations relative to a record"""
+    try:
+        _list_adapter(model_cls).validate_python(_copy_records(records))
+    except ValidationError as e:
+        errors = {}
+        for error in e.errors(include_url=False):
+            position, error["loc"] = error["loc"][0], error["loc"][1:]
+            errors.setdefault(position, []).append(error)
+        if len(errors) == len(records):
+            return errors
+    raise Exception("The records failed validation in a batch only")
+
+
+def _validate_one_by_one(model_cls, records):
+    models = []
+    errors = {}
+    for index, record in enumerate(records):
+        try:
+            models.append(model_cls.model_validate(dict(record) if isinstance(record, dict) else record))
+        except ValidationError as e:
+            models.append(None)
+            errors[index] = e.errors(include_url=False)
+        except Exception as e:
+            models.append(None)
+            errors[index] = [{"type": type(e).__name__, "loc": (), "msg": str(e), "input": record}]
+    return ValidationReport(models, errors)
+
+
+@lru_cache(maxsize=None)
+def _batch_adapter(model_cls):
+    # a record failing validation as model_cls validates as Any, the record itself, instead of failing the list
+    return TypeAdapter(List[Annotated[Union[model_cls, Any], Field(union_mode='left_to_right')]])
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model_cls):
+    return TypeAdapter(List[model_cls])
+
+
+def _match_schema(metadata_graph):
+    """
+    Finds the schema of the root node in a metadata graph with a single pass over its RDF.type triples.
+
+    A resource map describes and lists the nodes it aggregates, which may carry aggregation types of their own. When a
+    resource map is found it is the root, the other types are skipped.
+    Returns a (schema, subject) tuple, (None, None) when no known type is found
+    """
+    roots = {}
+    for subject, rdf_type in metadata_graph.subject_objects(predicate=RDF.type):
+        schema = rdf_schemas.get(rdf_type)
+        if schema:
+            # every schema of the subject is kept, a subject of two root types is as ambiguous as two subjects
+            roots.setdefault(subject, {}).setdefault(schema, rdf_type)
+    found = [(subject, schema, rdf_type) for subject, schemas in roots.items() for schema, rdf_type in schemas.items()]
+    resource_maps = [root for root in found if root[1] is ResourceMap]
+    if resource_maps:
+        found = resource_maps
+    if len(found) > 1:
+        raise Exception(
+            "Found more than one root type, could not choose a schema for {}".format(
+                ", ".join(sorted("{} ({})".format(subject, rdf_type) for subject, _, rdf_type in found))
+            )
+        )
+    for subject, schema, _ in found:
+        return schema, subject
+    return None, None
+
+
+def parse_file(schema, file, file_format='xml', subject=None, native=False):
+    metadata_graph = _read_graph(file, file_format=file_format, native=native)
     return _parse(schema, metadata_graph, subject)
 
 
-def rdf_graph(schema):
+def _read_graph(source=None, data=None, file_format='xml', native=False):
+    if native and file_format == 'xml':
+        position = source.tell() if hasattr(source, 'seek') else None
+        try:
+            return read_rdf_xml(source, data)
+        except (UnsupportedRDFXML, ParseError) as e:
+            logger.debug("Parsing with rdflib, the native RDF/XML reader could not read the document: %s", e)
+            if position is not None:
+                source.seek(position)
+    return Graph().parse(source, data=data, format=file_format)
+
+
+def iter_triples(schema):
+    """
+    Yields the (subject, predicate, object) triples of a model one at a time, without building a graph.
+
+    The triples come in the order rdf_graph adds them, a triple may be yielded more than once.
+    """
+    if isinstance(schema, LazyMetadata):
+        schema = schema.materialize()
     for rdf_schema, user_schema in user_schemas.items():
         if isinstance(schema, user_schema):
-            return _rdf_graph(rdf_schema(**schema.model_dump(to_rdf=True)), Graph())
-    return _rdf_graph(schema, Graph())
+            cache = rdf_cache(schema)
+            if cache is not None:
+                return _iter_tracked_triples(rdf_schema, schema, cache)
+            return _iter_user_triples(rdf_schema, schema)
+    return _iter_triples(schema)
+
 
+def rdf_graph(schema):
+    return _rdf_graph(iter_triples(schema), Graph())
 
-def rdf_string(schema, rdf_format='pretty-xml'):
+
+def rdf_string(schema, rdf_format='pretty-xml', native=False, canonical=False):
+    """
+    Serializes a model to an RDF document.
+
+    :param native: write RDF/XML (rdf_format pretty-xml or xml) with the writer in hsmodels.schemas.rdf.writer
+        instead of rdflib, the document is graph isomorphic to rdflib's and uses the prefixes of hsmodels.namespaces
+    :param canonical: write the same bytes for the same metadata, blank nodes are labelled from their content and the
+        triples sorted as in hsmodels.schemas.rdf.canonical. Supported for the RDF/XML and N-Triples (nt) formats
+    """
+    if canonical:
+        return _canonical_string([schema], rdf_format)
+    if native and rdf_format in ('pretty-xml', 'xml'):
+        return write_rdf_xml(iter_triples(schema))
     return rdf_graph(schema).serialize(format=rdf_format).decode()
 
 
-def _rdf_fields(schema):
-    for fname, finfo in schema.model_fields.items():
-        if fname not in ['rdf_subject', 'rdf_type', 'label', 'dc_type']:
-            predicate = None
-            if finfo.json_schema_extra:
-                predicate = finfo.json_schema_extra.get('rdf_predicate', None)
-            if not predicate:
-                raise Exception(
-                    "Schema configuration error for {}, all fields must specify a rdf_predicate".format(schema)
-                )
-            yield finfo, fname, predicate
-
-
-def _rdf_graph(schema, graph=None):
-    for f, fname, predicate in _rdf_fields(schema):
-        values = getattr(schema, fname, None)
-        if values is not None:
-            if not isinstance(values, list):
-                # handle single values as a list to simplify
-                values = [values]
-            for value in values:
-                if isinstance(value, BaseModel):
-                    assert hasattr(value, "rdf_subject")
-                    # nested class
-                    graph.add((schema.rdf_subject, predicate, value.rdf_subject))
-                    graph = _rdf_graph(value, graph)
+def rdf_write(schema, fp, rdf_format='pretty-xml', native=False, canonical=False):
+    """
+    Serializes a model to a binary file-like object, in UTF-8, without building the document as a string first.
+
+    The arguments are those of rdf_string. rdflib formats are serialized straight into fp, the native and canonical
+    writers encode their output in chunks as they write it.
+    """
+    if canonical:
+        triples = _canonical_triples([schema])
+        if rdf_format in ('nt', 'ntriples'):
+            write_lines(fp, map(triple_ntriples, triples))
+            return
+        _check_canonical_format(rdf_format)
+        RDFXMLWriter().add_triples(triples).write(fp)
+    elif native and rdf_format in ('pretty-xml', 'xml'):
+        RDFXMLWriter().add_triples(iter_triples(schema)).write(fp)
+    elif rdf_format in ('nt', 'ntriples'):
+        # rdflib writes N-Triples in UTF-8 only and warns about an encoding argument
+        rdf_graph(schema).serialize(destination=fp, format=rdf_format)
+    else:
+        rdf_graph(schema).serialize(destination=fp, format=rdf_format, encoding='utf-8')
+
+
+def _check_canonical_format(rdf_format):
+    if rdf_format not in ('nt', 'ntriples', 'pretty-xml', 'xml'):
+        raise Exception(
+            "Canonical serialization supports the pretty-xml, xml and nt formats, not {}".format(rdf_format)
+        )
+
+
+def _canonical_string(schemas, rdf_format):
+    if rdf_format in ('nt', 'ntriples'):
+        return write_ntriples(_canonical_triples(schemas))
+    _check_canonical_format(rdf_format)
+    return write_rdf_xml(_canonical_triples(schemas))
+
+
+def _canonical_triples(schemas):
+    """The canonical triples of models, the subjects hs_uid gave the models by default are labelled from content"""
+    triples = []
+    minted = set()
+    for schema in schemas:
+        if isinstance(schema, LazyMetadata):
+            schema = schema.materialize()
+        triples.extend(iter_triples(schema))
+        minted.update(_minted_subjects(schema))
+    return canonical_triples(triples, minted)
+
+
+def _minted_subjects(schema):
+    """Yields the subjects hs_uid minted for a model and its nested models, as they were not given one"""
+    if not isinstance(schema, BaseModel):
+        return
+    field = type(schema).model_fields.get("rdf_subject")
+    if field is not None and field.default_factory is hs_uid and "rdf_subject" not in schema.model_fields_set:
+        yield schema.rdf_subject
+    for name in type(schema).model_fields:
+        value = getattr(schema, name, None)
+        for item in value if isinstance(value, list) else [value]:
+            yield from _minted_subjects(item)
+
+
+def _iter_user_triples(rdf_schema, schema):
+    """
+    Yields the triples of a user model through the mapping of its *InRDF model, without validating the model again.
+
+    The before validators of the RDF models reshape the dumped user fields into RDF nodes, the checks validation would
+    run were passed by the user model already. Creators without a creator_order are numbered as validation would.
+    """
+    values = _user_rdf_values(rdf_schema, schema)
+    return _iter_values_triples(rdf_schema, _values_subject(rdf_schema, values), values)
+
+
+def _user_rdf_values(rdf_schema, schema):
+    values = run_before_validators(rdf_schema, schema.model_dump(to_rdf=True))
+    if "creators" in values and issubclass(rdf_schema, BaseResource):
+        values["creators"] = _order_creators(values["creators"])
+    return values
+
+
+def _values_subject(rdf_schema, values):
+    subject = values.get("rdf_subject")
+    if subject is None:
+        return rdf_schema.model_fields["rdf_subject"].default_factory()
+    return subject if isinstance(subject, Identifier) else Identifier(str(subject))
+
+
+def _iter_values_triples(rdf_schema, subject, values):
+    # the dictionary counterpart of _iter_triples, values have been through the model before validators
+    plan = model_plan(rdf_schema)
+    for field in plan.fields:
+        for value in _field_values(rdf_schema, field, values):
+            yield from _iter_value_triples(field, subject, value)
+    yield from _iter_type_triples(rdf_schema, plan, subject, values)
+
+
+def _field_values(rdf_schema, field, values):
+    if field.name in values:
+        field_values = run_before_field_validators(rdf_schema, field.name, values[field.name])
+    else:
+        default = _plan_defaults(rdf_schema).get(field.name)
+        field_values = default() if default else None
+    if field_values is None:
+        return []
+    return field_values if isinstance(field_values, list) else [field_values]
+
+
+def _iter_value_triples(field, subject, value):
+    if field.to_term is not None:
+        yield subject, field.predicate, field.to_term(value)
+    elif isinstance(value, BaseModel):
+        yield subject, field.predicate, value.rdf_subject
+        yield from _iter_triples(value)
+    else:
+        value = run_before_validators(field.nested_class, value)
+        nested_subject = _values_subject(field.nested_class, value)
+        yield subject, field.predicate, nested_subject
+        yield from _iter_values_triples(field.nested_class, nested_subject, value)
+
+
+def _iter_type_triples(rdf_schema, plan, subject, values):
+    if plan.type_fields:
+        rdf_type = values.get('rdf_type', rdf_schema.model_fields['rdf_type'].default)
+        if 'rdf_type' in plan.type_fields:
+            yield subject, RDF.type, rdf_type
+        if 'dc_type' in plan.type_fields:
+            yield subject, DC.type, values.get('dc_type', rdf_schema.model_fields['dc_type'].default)
+        if 'label' in plan.type_fields:
+            label = values.get('label', rdf_schema.model_fields['label'].default)
+            yield URIRef(str(rdf_type)), RDFS1.label, Literal(label)
+            yield URIRef(str(rdf_type)), RDFS1.isDefinedBy, URIRef("https://www.hydroshare.org/terms/")
+
+
+class _RDFCache(NamedTuple):
+    """The triples last generated for a user model tracking its changes"""
+
+    subject: Any
+    # field name -> [(value, triples)] for each value of the RDF field, the values as they were before serializing
+    fields: dict
+    types: list
+
+
+def _iter_tracked_triples(rdf_schema, schema, model_cache):
+    """
+    Yields the triples of a user model tracking its changes, regenerating the triples of the changed values only.
+
+    The values of every field are compared one by one to the values last serialized, a value found unchanged reuses
+    its triples so editing a single creator regenerates the triples of that creator alone. Comparing the values rather
+    than trusting the fields assigned also catches the changes made in place, such as editing a nested model or
+    appending to a list.
+    """
+    values = _user_rdf_values(rdf_schema, schema)
+    subject = _values_subject(rdf_schema, values)
+    cache = model_cache.get("triples")
+    if cache is None or cache.subject != subject:
+        cache = model_cache["triples"] = _RDFCache(subject, {}, [])
+
+    plan = model_plan(rdf_schema)
+    for field in plan.fields:
+        cached = cache.fields.get(field.name)
+        field_values = list(_field_values(rdf_schema, field, values))
+        if cached is None or len(cached) != len(field_values) or any(
+            cached_value != value for (cached_value, _), value in zip(cached, field_values)
+        ):
+            regenerated = []
+            for index, value in enumerate(field_values):
+                if cached is not None and index < len(cached) and cached[index][0] == value:
+                    regenerated.append(cached[index])
                 else:
-                    # primitive value
-                    if isinstance(value, (Url, AnyUrl)):
-                        value = URIRef(str(value))
-                    elif isinstance(value, TermEnum):
-                        value = URIRef(value.value)
-                    elif isinstance(value, Enum):
-                        value = Literal(value.value)
-                    else:
-                        value = Literal(value)
-                    graph.add((schema.rdf_subject, predicate, value))
-    if hasattr(schema, 'rdf_type'):
-        graph.add((schema.rdf_subject, RDF.type, schema.rdf_type))
-    if hasattr(schema, 'dc_type'):
-        graph.add((schema.rdf_subject, DC.type, schema.dc_type))
-    if hasattr(schema, 'label'):
-        graph.add((URIRef(str(schema.rdf_type)), RDFS1.label, Literal(schema.label)))
-        graph.add((URIRef(str(schema.rdf_type)), RDFS1.isDefinedBy, URIRef("https://www.hydroshare.org/terms/")))
+                    # the nested values are reshaped in place as their triples are generated
+                    regenerated.append((deepcopy(value), list(_iter_value_triples(field, subject, value))))
+            cached = cache.fields[field.name] = regenerated
+        for value, triples in cached:
+            yield from triples
+    if not cache.types:
+        cache.types.extend(_iter_type_triples(rdf_schema, plan, subject, values))
+    yield from cache.types
+
+
+@lru_cache(maxsize=None)
+def _plan_defaults(rdf_schema):
+    """The callables returning the default of each field of rdf_schema with a default other than None"""
+    defaults = {name: partial(copy, default) for name, default in model_plan(rdf_schema).defaults}
+    defaults.update(default_factories(rdf_schema))
+    return defaults
+
+
+def rdf_graph_many(schemas, graph=None):
+    """
+    Adds the triples of many models to one graph, for exporting a resource with its aggregations or a collection
+    with its members in one document.
+
+    :param schemas: an iterable of models
+    :param graph: the rdflib Graph or hsmodels.schemas.rdf.writer.RDFXMLWriter to add to, a new Graph when None
+    :return: the graph
+    """
+    if graph is None:
+        graph = Graph()
+    for schema in schemas:
+        _rdf_graph(iter_triples(schema), graph)
     return graph
 
 
-def get_args(t):
-    return getattr(t, "__args__", None)
+def rdf_string_many(schemas, rdf_format='pretty-xml', native=False, canonical=False):
+    """Serializes many models to one RDF document, see rdf_graph_many and rdf_string"""
+    if canonical:
+        return _canonical_string(schemas, rdf_format)
+    if native and rdf_format in ('pretty-xml', 'xml'):
+        return rdf_graph_many(schemas, RDFXMLWriter()).serialize()
+    return rdf_graph_many(schemas).serialize(format=rdf_format).decode()
 
 
-def _parse(schema, metadata_graph, subject=None):
-    def get_nested_class(field):
-        origin = field.annotation
-        if origin:
-            if inspect.isclass(origin) and issubclass(origin, BaseModel):
-                return origin
-            if get_args(origin):
-                clazz = get_args(origin)[0]
-                if inspect.isclass(clazz) and issubclass(clazz, BaseModel):
-                    return clazz
-        return None
+def _rdf_graph(triples, graph):
+    for triple in triples:
+        graph.add(triple)
+    return graph
 
-    def class_rdf_type(schema):
-        if schema.model_fields['rdf_type']:
-            return schema.model_fields['rdf_type'].default
-        return None
 
+def _iter_triples(schema):
+    plan = model_plan(type(schema))
+    subject = schema.rdf_subject
+    for field in plan.fields:
+        values = getattr(schema, field.name, None)
+        if values is None:
+            continue
+        if not isinstance(values, list):
+            # handle single values as a list to simplify
+            values = [values]
+        if field.to_term is None:
+            # nested class
+            for value in values:
+                yield subject, field.predicate, value.rdf_subject
+                yield from _iter_triples(value)
+        else:
+            to_term = field.to_term
+            for value in values:
+                yield subject, field.predicate, to_term(value)
+    if plan.type_fields:
+        if 'rdf_type' in plan.type_fields:
+            yield subject, RDF.type, schema.rdf_type
+        if 'dc_type' in plan.type_fields:
+            yield subject, DC.type, schema.dc_type
+        if 'label' in plan.type_fields:
+            yield URIRef(str(schema.rdf_type)), RDFS1.label, Literal(schema.label)
+            yield URIRef(str(schema.rdf_type)), RDFS1.isDefinedBy, URIRef("https://www.hydroshare.org/terms/")
+
+
+def _parse(schema, metadata_graph, subject=None, as_dict=False, fields=None):
+    """
+    Parses the node of a metadata graph into an instance of schema.
+
+    With as_dict the node is returned as the dictionary of values the instance would be validated from, nested
+    nodes included, filled with the non None defaults of the schema fields. fields limits the dictionary to the
+    given field names of the node.
+    """
+    plan = model_plan(schema)
     if not subject:
         # lookup subject using RDF.type specified in the schema
-        target_class = class_rdf_type(schema)
-        if not target_class:
+        if not plan.rdf_type:
             raise Exception("Subject must be provided, no RDF.type specified on class {}".format(schema))
-        subject = metadata_graph.value(predicate=RDF.type, object=target_class)
+        subject = metadata_graph.value(predicate=RDF.type, object=plan.rdf_type)
         if not subject:
-            raise Exception("Could not find subject for predicate=RDF.type, object={}".format(target_class))
+            raise Exception("Could not find subject for predicate=RDF.type, object={}".format(plan.rdf_type))
+
+    # gather every triple of the node in one sweep, the fields are filled from the predicate buckets
+    buckets = {}
+    for predicate, value in metadata_graph.predicate_objects(subject):
+        if predicate in buckets:
+            buckets[predicate].append(value)
+        else:
+            buckets[predicate] = [value]
+    if logger.isEnabledFor(logging.DEBUG):
+        for predicate in buckets.keys() - plan.known_predicates:
+            logger.debug("Ignoring unknown predicate %s on %s parsed as %s", predicate, subject, schema.__name__)
 
     kwargs = {}
-    for f, name, predicate in _rdf_fields(schema):
+    for field in plan.fields:
+        if fields is not None and field.name not in fields:
+            continue
         parsed = []
-        for value in metadata_graph.objects(subject=subject, predicate=predicate):
-            nested_clazz = get_nested_class(f)
-            if nested_clazz:
-                parsed_class = _parse(nested_clazz, metadata_graph, value)
+        for value in buckets.get(field.predicate, ()):
+            if field.nested_class:
+                parsed_class = _parse(field.nested_class, metadata_graph, value, as_dict)
                 if parsed_class:
                     parsed.append(parsed_class)
             else:
-                # not a nested class (primitive class and not a subclass of BaseModel)
-
-                origin = f.annotation
-                origin_clazz = getattr(origin, '__origin__', None)
-                parsed_value = None
-                if origin_clazz is list:
-                    clazz = origin.__args__[0]
-                    if issubclass(clazz, BaseModel):
-                        parsed_class = _parse(clazz, metadata_graph, value)
-                        if parsed_class:
-                            parsed.append(parsed_class)
-                    else:
-                        # primitive value
-                        parsed_value = str(value.toPython())
-                else:
-                    # primitive value
-                    parsed_value = str(value.toPython())
-
+                # primitive value
+                parsed_value = field.coerce(value)
                 if parsed_value:
                     parsed.append(parsed_value)
 
         if len(parsed) > 0:
-            origin = f.annotation
-            origin_clazz = getattr(origin, '__origin__', None)
-            if origin_clazz is list:
-                # list
-                kwargs[name] = parsed
+            if field.is_list:
+                kwargs[field.name] = parsed
             else:
-                # single
-                kwargs[name] = parsed[0]
-    if kwargs:
+                kwargs[field.name] = parsed[0]
+    if kwargs or fields is not None:
+        if as_dict:
+            for name, default in plan.defaults:
+                if name not in kwargs and (fields is None or name in fields):
+                    kwargs[name] = list(default) if isinstance(default, list) else default
+            kwargs["rdf_subject"] = subject
+            return kwargs
         instance = schema(**kwargs, rdf_subject=subject)
         return instance
     return None
+
+
+_dates_adapter = TypeAdapter(Annotated[List[DateInRDF], AfterValidator(partial(dates_constraint, None))])
+_coverages_adapter = TypeAdapter(Annotated[List[CoverageInRDF], AfterValidator(partial(coverages_constraint, None))])
+_creator_order_adapter = TypeAdapter(PositiveInt)
+
+
+def _user_model(rdf_schema, values):
+    """
+    Validates the user model of rdf_schema straight from the values parsed by _parse(as_dict=True).
+
+    The user model root validators map the RDF field names (dates, coverages, extended_metadata, rdf_subject, ...)
+    onto the user fields, so the *InRDF model is never built. The RDF side checks the user models do not repeat,
+    the dates and coverages constraints of resources and the ordering of the creators, are applied here.
+    """
+    values = _check_rdf_values(rdf_schema, values)
+    return user_schemas[rdf_schema].model_validate(values)
+
+
+def _check_rdf_values(rdf_schema, values):
+    """Applies the RDF side checks to the parsed values present in values"""
+    if issubclass(rdf_schema, BaseResource):
+        if "dates" in values:
+            _validate_rdf_field(rdf_schema, "dates", DateInRDF, _dates_adapter, values["dates"])
+        if "coverages" in values:
+            _validate_rdf_field(rdf_schema, "coverages", CoverageInRDF, _coverages_adapter, values["coverages"])
+        if "creators" in values:
+            values["creators"] = _order_creators(values["creators"])
+    return values
+
+
+def _validate_rdf_field(rdf_schema, name, item_schema, adapter, values):
+    # the errors are raised as parsing the *InRDF model raises them, the nested models are validated one by one, then
+    # the field constraint under the title of the model and located in the field
+    items = [item_schema.model_validate(value) for value in values]
+    try:
+        adapter.validate_python(items)
+    except ValidationError as e:
+        title = rdf_schema.model_config.get("title") or rdf_schema.__name__
+        raise ValidationError.from_exception_data(title, field_line_errors(name, e))
+
+
+def _order_creators(creators):
+    """Sorts parsed creators by creator_order, numbering the creators without one after the highest order"""
+    orders = []
+    for creator in creators:
+        if "creator_order" in creator:
+            creator["creator_order"] = _creator_order_adapter.validate_python(creator["creator_order"])
+            orders.append(creator["creator_order"])
+    next_order = max(orders, default=0)
+    for creator in creators:
+        if "creator_order" not in creator:
+            next_order += 1
+            creator["creator_order"] = next_order
+    return sorted(creators, key=lambda creator: creator["creator_order"])
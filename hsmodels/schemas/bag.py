@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import time
+from typing import NamedTuple
+from urllib.parse import urlsplit
+from uuid import uuid4
+
+from hsmodels.schemas.lazy import LazyMetadata
+from hsmodels.schemas.rdf.resource import ResourceMap
+
+
+class ExportedFile(NamedTuple):
+    """A file written by export_bag"""
+
+    # the path of the file relative to the bag directory, data/resourcemetadata.xml for instance
+    path: str
+    size: int
+    # the time taken to serialize and write the file
+    seconds: float
+
+
+def bag_path(url):
+    """The path of a metadata file in a bag from its url, the part of the url path from data/ on"""
+    path = urlsplit(str(url)).path
+    index = path.find("/data/")
+    if index < 0:
+        raise Exception("Can not place {} in a bag, its path has no data directory".format(url))
+    return path[index + 1 :]
+
+
+def bag_files(resource, resource_map=None, aggregations=()):
+    """
+    Lists the (path, model) of the metadata files of a bag, the paths are relative to the bag directory.
+
+    :param resource: the resource metadata, written to data/resourcemetadata.xml
+    :param resource_map: the ResourceMap of the resource, written to data/resourcemap.xml
+    :param aggregations: the aggregation metadata models, or (metadata, ResourceMap) pairs to write the resource map
+        of an aggregation alongside its metadata. An aggregation is written next to the resource map its url names,
+        <name>_resmap.xml#aggregation is written to <name>_meta.xml
+    """
+    files = [("data/resourcemetadata.xml", resource)]
+    if resource_map is not None:
+        files.append((_resource_map_path(resource_map, "data/resourcemap.xml"), resource_map))
+    for aggregation in aggregations:
+        aggregation_map = None
+        if isinstance(aggregation, tuple):
+            aggregation, aggregation_map = aggregation
+        resmap_path = bag_path(aggregation.url)
+        if not resmap_path.endswith("_resmap.xml"):
+            raise Exception("The url of aggregation {} does not name a resource map".format(aggregation.url))
+        files.append((resmap_path[: -len("_resmap.xml")] + "_meta.xml", aggregation))
+        if aggregation_map is not None:
+            files.append((_resource_map_path(aggregation_map, resmap_path), aggregation_map))
+    return files
+
+
+def _resource_map_path(resource_map, default):
+    if not isinstance(resource_map, ResourceMap):
+        raise Exception("Expected a ResourceMap, got {}".format(type(resource_map).__name__))
+    if resource_map.describes.is_described_by:
+        return bag_path(resource_map.describes.is_described_by)
+    return default
+
+
+def export_bag(
+    directory,
+    resource,
+    resource_map=None,
+    aggregations=(),
+    workers=None,
+    chunksize=4,
+    rdf_format='pretty-xml',
+    native=False,
+):
+    """
+    Writes the metadata files of a resource and its aggregations into a bag directory, serializing them in parallel.
+
+    Each file is written to a temporary file first and moved in place, a failed export leaves no partial file behind.
+    The arguments naming the files are those of bag_files, rdf_format and native are those of rdf_string.
+
+    :param directory: the bag directory, the files are written to its data directory
+    :param workers: the number of worker processes, None for one per CPU, 0 to serialize in the calling process
+    :param chunksize: the number of files sent to a worker at a time
+    :return: the ExportedFile of each file, in the order of bag_files
+    """
+    tasks = []
+    for path, model in bag_files(resource, resource_map, aggregations):
+        if isinstance(model, LazyMetadata):
+            model = model.materialize()
+        tasks.append((directory, path, model, rdf_format, native))
+    if workers == 0:
+        return list(map(_export_file, tasks))
+    with multiprocessing.Pool(workers) as pool:
+        return pool.map(_export_file, tasks, chunksize)
+
+
+def _export_file(task):
+    from hsmodels.schemas import rdf_write
+
+    directory, path, model, rdf_format, native = task
+    started = time.perf_counter()
+    full_path = os.path.join(directory, *path.split("/"))
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    tmp_path = "{}.{}.tmp".format(full_path, uuid4().hex)
+    # the kernel applies the umask to the mode, the file gets the permissions open would give it
+    fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            rdf_write(model, f, rdf_format=rdf_format, native=native)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return ExportedFile(path, os.path.getsize(full_path), time.perf_counter() - started)
@@ -1,8 +1,25 @@
+import weakref
+from contextlib import contextmanager
 from datetime import datetime
 from typing import Any, Literal, Union
 
 import typing_extensions
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, ValidationError
+
+from hsmodels.schemas.construct import field_line_errors, run_before_validators, validate_field
+from hsmodels.schemas.rdf.plans import USER_FIELD_SOURCES
+
+# the state of the models editing in batches and tracking changes, by id of the model. It is kept out of the models so
+# that comparing, copying and pickling a model ignores it
+# the number of batch_edit blocks a model is in, assignments are not validated while the model is listed
+_batch_depths = {}
+# the serialization cache of the models tracking their changes, filled in by rdf_graph
+_rdf_caches = {}
+
+
+def rdf_cache(model):
+    """Returns the dictionary rdf_graph caches the triples of a model in, None when the model does not track changes"""
+    return _rdf_caches.get(id(model))
 
 
 class BaseMetadata(BaseModel):
@@ -86,6 +103,109 @@ class BaseMetadata(BaseModel):
             serialize_as_any=serialize_as_any,
         )
 
+    def apply_patch(self, patch):
+        """
+        Returns a copy of the model with the fields in patch validated and replaced, the other fields are shared.
+
+        patch takes the names model_validate takes, the model before validators map them onto the fields as they do
+        for a complete model (coverages onto spatial_coverage and period_coverage, a list of additional_metadata
+        onto a dictionary, ...). Only the fields patch sets are validated. A field in patch replaces the value of the
+        model, but for dictionaries such as additional_metadata, whose keys are merged into those of the model. Nested
+        models the patch does not replace are the instances of the model, they are not copied.
+
+        :raises pydantic.ValidationError: with the errors of every field of patch that does not pass validation, or
+            assigns a frozen field
+        """
+        cls = type(self)
+        values = run_before_validators(cls, dict(patch))
+        updates = {}
+        errors = []
+        for name, value in values.items():
+            field = cls.model_fields.get(name)
+            # the before validators also fill in fields of their own, such as an empty file_types, those are dropped
+            if field is None or not (name in patch or any(key in patch for key in USER_FIELD_SOURCES.get(name, ()))):
+                continue
+            if field.frozen:
+                errors.append({"type": "frozen_field", "loc": (name,), "input": value})
+                continue
+            try:
+                value = validate_field(cls, name, value)
+            except ValidationError as e:
+                errors.extend(field_line_errors(name, e))
+                continue
+            current = getattr(self, name)
+            updates[name] = {**current, **value} if isinstance(current, dict) and isinstance(value, dict) else value
+        if errors:
+            raise ValidationError.from_exception_data(cls.model_config.get("title") or cls.__name__, errors)
+
+        patched = self.model_copy(update=updates)
+        if rdf_cache(self) is not None:
+            patched.track_changes()
+        return patched
+
+    def __setattr__(self, name, value):
+        if id(self) in _batch_depths and name in type(self).model_fields and not type(self).model_fields[name].frozen:
+            self.__dict__[name] = value
+            self.__pydantic_fields_set__.add(name)
+        else:
+            super().__setattr__(name, value)
+
+    @contextmanager
+    def batch_edit(self):
+        """
+        Defers the validation of the assignments made in the block to one validation of the model when the block exits.
+
+        The errors validating an assignment would raise are raised when the block exits, the fields assigned in the
+        block are then restored. Changes made in place, such as appending to a list, are validated with the rest of the
+        model. Frozen fields refuse assignments in the block as they do outside of it. Blocks may be nested, the model
+        is validated when the outermost one exits.
+        """
+        key = id(self)
+        if key in _batch_depths:
+            _batch_depths[key] += 1
+            try:
+                yield self
+            finally:
+                _batch_depths[key] -= 1
+            return
+
+        _batch_depths[key] = 1
+
+        saved_values = dict(self.__dict__)
+        saved_fields_set = set(self.__pydantic_fields_set__)
+        try:
+            yield self
+            fields_set = self.__pydantic_fields_set__
+            # the fields left unset hold their defaults, None where the type may not allow it
+            values = {
+                name: value for name, value in self.__dict__.items() if name in fields_set or value is not None
+            }
+            validated = type(self).model_validate(values)
+        except BaseException:
+            self.__dict__.clear()
+            self.__dict__.update(saved_values)
+            object.__setattr__(self, "__pydantic_fields_set__", saved_fields_set)
+            raise
+        finally:
+            del _batch_depths[key]
+        self.__dict__.update(validated.__dict__)
+
+    def track_changes(self):
+        """
+        Keeps the triples rdf_graph generates for the model to regenerate only those of the values that change,
+        returns the model.
+
+        Each serialization compares the values of the model to those last serialized and reuses the triples of the
+        values found unchanged, whether a value was assigned or changed in place, such as appending to a list or
+        assigning a field of a nested model. Copies of the model do not track changes.
+        """
+        key = id(self)
+        if key not in _rdf_caches:
+            _rdf_caches[key] = {}
+            # the id may be reused once the model is collected
+            weakref.finalize(self, _rdf_caches.pop, key, None)
+        return self
+
     model_config = ConfigDict(validate_assignment=True)
 
 
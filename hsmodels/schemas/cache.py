@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from importlib.metadata import PackageNotFoundError, version
+from io import BytesIO
+from typing import NamedTuple, Optional
+
+from hsmodels.schemas.base_models import BaseMetadata
+
+logger = logging.getLogger(__name__)
+
+
+def _hsmodels_version():
+    try:
+        return version("hsmodels")
+    except PackageNotFoundError:
+        # running from a source checkout, documents cached by a checkout are keyed apart from released versions
+        return "source"
+
+
+class CacheInfo(NamedTuple):
+    """Statistics of a ParseCache, disk_hits are counted in hits"""
+
+    hits: int
+    misses: int
+    evictions: int
+    disk_hits: int
+    maxsize: int
+    currsize: int
+
+
+class ParseCache:
+    """
+    A content addressed cache of parsed metadata documents.
+
+    Documents are keyed by the sha256 of their bytes, the hsmodels version and the parse arguments. The parsed models
+    are held in a bounded in memory LRU. With a directory, user models (the models load_rdf returns for resource and
+    aggregation metadata) are also written there as JSON so the cache survives restarts, *InRDF models are only held
+    in memory, the user models are validated from the JSON when read back.
+
+    :param maxsize: the number of models held in memory
+    :param directory: the directory of the on disk tier, None to cache in memory only
+    :param copy: return a deep copy of the cached model so callers may modify what they get back
+    """
+
+    def __init__(self, maxsize=128, directory=None, copy=True):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.copy = copy
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = _hsmodels_version()
+        self._hits = self._misses = self._evictions = self._disk_hits = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def load_rdf(self, rdf_str, file_format='xml', native=False):
+        """hsmodels.schemas.load_rdf, answered from the cache when the document was parsed before"""
+        from hsmodels.schemas import load_rdf
+
+        data = rdf_str.encode("utf-8") if isinstance(rdf_str, str) else rdf_str
+        key = self._key(data, "load_rdf", file_format)
+        return self._get(key, lambda: load_rdf(rdf_str, file_format=file_format, native=native))
+
+    def parse_file(self, schema, file, file_format='xml', subject=None, native=False):
+        """hsmodels.schemas.parse_file, answered from the cache when the file was parsed before"""
+        from hsmodels.schemas import parse_file
+
+        if hasattr(file, "read"):
+            data = file.read()
+        else:
+            with open(file, "rb") as f:
+                data = f.read()
+        data = data.encode("utf-8") if isinstance(data, str) else data
+        key = self._key(data, "parse_file", file_format, schema.__module__, schema.__qualname__, subject)
+        return self._get(
+            key, lambda: parse_file(schema, BytesIO(data), file_format=file_format, subject=subject, native=native)
+        )
+
+    def cache_info(self):
+        """Returns the CacheInfo statistics of the cache"""
+        with self._lock:
+            return CacheInfo(
+                self._hits, self._misses, self._evictions, self._disk_hits, self.maxsize, len(self._models)
+            )
+
+    def cache_clear(self):
+        """Empties the in memory tier and resets the statistics, the on disk tier is kept"""
+        with self._lock:
+            self._models.clear()
+            self._hits = self._misses = self._evictions = self._disk_hits = 0
+
+    def _key(self, data, *arguments):
+        digest = hashlib.sha256(data)
+        digest.update("\0".join([self._version] + [str(argument) for argument in arguments]).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _get(self, key, parse):
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self._hits += 1
+                return self._copy(model)
+
+        model = self._read(key)
+        if model is not None:
+            with self._lock:
+                self._hits += 1
+                self._disk_hits += 1
+        else:
+            model = parse()
+            with self._lock:
+                self._misses += 1
+            self._write(key, model)
+
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.maxsize:
+                self._models.popitem(last=False)
+                self._evictions += 1
+        return self._copy(model)
+
+    def _copy(self, model):
+        return model.model_copy(deep=True) if self.copy else model
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".json")
+
+    def _read(self, key) -> Optional[BaseMetadata]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                type_name, _, json_data = f.read().partition(b"\n")
+        except FileNotFoundError:
+            return None
+        from hsmodels.schemas import user_schemas
+
+        for schema in user_schemas.values():
+            if schema.__name__ == type_name.decode("utf-8"):
+                try:
+                    return schema.model_validate_json(json_data)
+                except ValueError as e:
+                    # malformed JSON or a model which no longer validates
+                    logger.warning("Discarding the unreadable cache entry %s: %s", path, e)
+                    break
+        os.remove(path)
+        return None
+
+    def _write(self, key, model):
+        if not self.directory or not isinstance(model, BaseMetadata):
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(type(model).__name__.encode("utf-8") + b"\n" + model.model_dump_json().encode("utf-8"))
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -0,0 +1,80 @@
+"""
+Helpers running the validators of a model piece by piece, outside of a complete validation of the model.
+
+The before validators map the RDF shaped values onto the model fields, the serializers run them without building the
+*InRDF models. A single field is validated with the field validators of its model, for patches applied to a model.
+"""
+from functools import lru_cache
+
+from pydantic import AfterValidator, BeforeValidator, TypeAdapter
+from pydantic_core import PydanticCustomError
+from typing_extensions import Annotated
+
+
+@lru_cache(maxsize=None)
+def default_factories(cls):
+    """Returns (name, default_factory) of the fields of cls with a default factory taking no arguments"""
+    return tuple(
+        (name, field.default_factory)
+        for name, field in cls.model_fields.items()
+        # factories taking the validated data exist from pydantic 2.10, those are left out
+        if field.default_factory is not None and not getattr(field, 'default_factory_takes_validated_data', False)
+    )
+
+
+def run_before_validators(cls, values):
+    """Runs the model before validators of cls on values, in the order pydantic runs them"""
+    # pydantic wraps the model with each before validator in turn, the last one declared runs first
+    for decorator in reversed(list(cls.__pydantic_decorators__.model_validators.values())):
+        if decorator.info.mode == 'before':
+            values = decorator.func(values)
+    return values
+
+
+def validate_field(cls, name, value):
+    """
+    Validates value as the field name of cls, running the before and after validators declared for the field
+
+    :raises pydantic.ValidationError: when the value does not pass validation
+    """
+    return _field_adapter(cls, name).validate_python(value)
+
+
+def field_line_errors(name, validation_error):
+    """
+    Returns the errors of a value validated alone as the field name, as line errors of its model located in the field
+
+    The line errors are given to ValidationError.from_exception_data to raise them under the title of the model.
+    """
+    return [
+        # rebuilt from the rendered messages, the context of custom errors does not survive errors()
+        {
+            "type": PydanticCustomError(error["type"], error["msg"]),
+            "loc": (name,) + tuple(error["loc"]),
+            "input": error["input"],
+        }
+        for error in validation_error.errors()
+    ]
+
+
+@lru_cache(maxsize=None)
+def _field_adapter(cls, name):
+    field = cls.model_fields[name]
+    validators = []
+    for decorator in cls.__pydantic_decorators__.field_validators.values():
+        if name in decorator.info.fields:
+            if decorator.info.mode == 'before':
+                validators.append(BeforeValidator(decorator.func))
+            elif decorator.info.mode == 'after':
+                validators.append(AfterValidator(decorator.func))
+    metadata = tuple(field.metadata) + tuple(validators)
+    return TypeAdapter(Annotated[(field.annotation,) + metadata] if metadata else field.annotation)
+
+
+def run_before_field_validators(cls, name, value):
+    """Runs the before validators of the field name of cls on value"""
+    # as with the model validators the last before validator declared runs first
+    for decorator in reversed(list(cls.__pydantic_decorators__.field_validators.values())):
+        if decorator.info.mode == 'before' and name in decorator.info.fields:
+            value = decorator.func(value)
+    return value
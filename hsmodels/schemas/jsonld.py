@@ -0,0 +1,94 @@
+"""
+JSON-LD documents of the metadata models, built from the model triples without an rdflib graph.
+
+The predicates come from the rdf_predicate of each field as iter_triples yields them, and are compacted with a fixed
+@context of the hsmodels.namespaces prefixes. Nodes are embedded in the node referencing them as the RDF/XML writer
+nests them, blank nodes referenced more than once keep an @id. Documents are dumped with pydantic-core.
+"""
+from pydantic_core import to_json
+from rdflib import BNode, Literal
+
+from hsmodels.namespaces import RDF, XSD
+from hsmodels.schemas.rdf.writer import KNOWN_NAMESPACES, NestedNodes, split_uri
+
+CONTEXT = {prefix: namespace for namespace, prefix in sorted(KNOWN_NAMESPACES.items(), key=lambda item: item[1])}
+
+_RDF_TYPE = RDF.type
+# literals of these datatypes are written as JSON numbers and booleans, the others as typed values
+_NATIVE_DATATYPES = {XSD.integer, XSD.boolean}
+
+
+def compact_iri(uri):
+    """Returns the compact IRI of a URI with the CONTEXT prefixes, the URI itself when no prefix applies"""
+    try:
+        namespace, local = split_uri(str(uri))
+    except Exception:
+        return str(uri)
+    prefix = KNOWN_NAMESPACES.get(namespace)
+    return "{}:{}".format(prefix, local) if prefix else str(uri)
+
+
+def jsonld_document(schema):
+    """Returns the JSON-LD document of a model as a dictionary"""
+    from hsmodels.schemas import iter_triples
+
+    return triples_document(iter_triples(schema))
+
+
+def jsonld_string(schema, indent=None):
+    """Returns the JSON-LD document of a model"""
+    return to_json(jsonld_document(schema), indent=indent).decode("utf-8")
+
+
+def triples_document(triples):
+    """Returns the JSON-LD document of an iterable of triples, the nodes nobody references at the top"""
+    nodes = NestedNodes()
+    for triple in triples:
+        nodes.add(triple)
+
+    written = set()
+    top = [_node(subject, nodes, written) for subject in nodes.top_nodes(written)]
+    document = {"@context": CONTEXT}
+    if len(top) == 1:
+        document.update(top[0])
+    else:
+        document["@graph"] = top
+    return document
+
+
+def _node(subject, nodes, written, nested=False):
+    written.add(subject)
+    node = {}
+    if not isinstance(subject, BNode):
+        node["@id"] = str(subject)
+    elif nodes.labelled(subject, nested):
+        node["@id"] = "_:" + str(subject)
+
+    for predicate, value in nodes.subjects.get(subject, ()):
+        if predicate == _RDF_TYPE and not isinstance(value, (BNode, Literal)):
+            key, value = "@type", compact_iri(value)
+        else:
+            key, value = compact_iri(predicate), _value(value, nodes, written)
+        if key not in node:
+            node[key] = value
+        elif isinstance(node[key], list):
+            node[key].append(value)
+        else:
+            node[key] = [node[key], value]
+    return node
+
+
+def _value(value, nodes, written):
+    if isinstance(value, Literal):
+        if value.language:
+            return {"@value": str(value), "@language": value.language}
+        if value.datatype in _NATIVE_DATATYPES and isinstance(value.toPython(), (bool, int)):
+            return value.toPython()
+        if value.datatype:
+            return {"@value": str(value), "@type": compact_iri(value.datatype)}
+        return str(value)
+    if nodes.nests(value, written):
+        return _node(value, nodes, written, nested=True)
+    if isinstance(value, BNode):
+        return {"@id": "_:" + str(value)}
+    return {"@id": str(value)}
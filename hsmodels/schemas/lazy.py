@@ -0,0 +1,74 @@
+from copy import copy, deepcopy
+
+from hsmodels.schemas.construct import run_before_validators, validate_field
+from hsmodels.schemas.rdf.plans import USER_FIELD_SOURCES
+
+
+class LazyMetadata:
+    """
+    A view of the user model of a parsed metadata document which validates each field on first access.
+
+    Fields are read through load_values, a callable taking the RDF field names to parse and returning their values.
+    The first time anything other than a field is needed (model_dump, model_dump_json, assignment, ...) the complete
+    model is validated with load_model and answers every access from then on.
+    """
+
+    def __init__(self, schema, load_values, load_model):
+        object.__setattr__(self, "_schema", schema)
+        object.__setattr__(self, "_load_values", load_values)
+        object.__setattr__(self, "_load_model", load_model)
+        object.__setattr__(self, "_fields", {})
+        object.__setattr__(self, "_model", None)
+
+    def __getattr__(self, name):
+        # only called for the names not set in __init__. Private and special names are not looked up on the model, copy
+        # and pickle probe them on instances __init__ has not run on
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._model is None and name in self._schema.model_fields:
+            if name not in self._fields:
+                self._fields[name] = self._validate_field(name)
+            return self._fields[name]
+        return getattr(self.materialize(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self.materialize(), name, value)
+
+    def __copy__(self):
+        copied = LazyMetadata(self._schema, self._load_values, self._load_model)
+        copied._fields.update(self._fields)
+        if self._model is not None:
+            object.__setattr__(copied, "_model", copy(self._model))
+        return copied
+
+    def __deepcopy__(self, memo):
+        # the loaders only read the parsed document, the copy shares them
+        copied = LazyMetadata(self._schema, self._load_values, self._load_model)
+        copied._fields.update(deepcopy(self._fields, memo))
+        if self._model is not None:
+            object.__setattr__(copied, "_model", deepcopy(self._model, memo))
+        return copied
+
+    def __repr__(self):
+        if self._model is None:
+            return "{}({}, loaded={})".format(type(self).__name__, self._schema.__name__, sorted(self._fields))
+        return repr(self._model)
+
+    @property
+    def model_class(self):
+        """The user model class of the document"""
+        return self._schema
+
+    def materialize(self):
+        """Returns the user model of the document, validated on the first call"""
+        if self._model is None:
+            object.__setattr__(self, "_model", self._load_model())
+            self._fields.clear()
+        return self._model
+
+    def _validate_field(self, name):
+        values = self._load_values(USER_FIELD_SOURCES.get(name, (name,)))
+        values = run_before_validators(self._schema, values)
+        if name in values:
+            return validate_field(self._schema, name, values[name])
+        return self._schema.model_fields[name].get_default(call_default_factory=True)
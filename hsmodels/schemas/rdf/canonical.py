@@ -0,0 +1,117 @@
+"""
+Canonical serialization of metadata triples, equal metadata is written to equal bytes.
+
+Blank nodes are relabelled from their content: the hash of a node covers its own triples with the hashes of the blank
+nodes it references, and the triples referencing it. Blank nodes with equal hashes are interchangeable, they are
+numbered in turn. The subjects hs_uid mints at random for the models given none are relabelled the same way, in the
+hsresource namespace. The triples are then sorted by their N-Triples form so the documents may be hashed or compared
+byte for byte instead of as graphs.
+"""
+import hashlib
+
+from rdflib import BNode, Literal, URIRef
+
+from hsmodels.namespaces import HSRESOURCE
+
+_LITERAL_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r"})
+
+
+def term_ntriples(term):
+    """Returns the N-Triples form of an rdflib term"""
+    if isinstance(term, BNode):
+        return "_:" + str(term)
+    if isinstance(term, Literal):
+        text = '"' + str(term).translate(_LITERAL_ESCAPES) + '"'
+        if term.language:
+            return text + "@" + term.language
+        if term.datatype:
+            return text + "^^<" + str(term.datatype) + ">"
+        return text
+    # str first, rdflib terms build a new term of their own class on concatenation
+    return "<" + str(term) + ">"
+
+
+def triple_ntriples(triple):
+    """Returns the N-Triples line of a triple, without the line break"""
+    return " ".join(term_ntriples(term) for term in triple) + " ."
+
+
+class _Labeller:
+    def __init__(self, triples):
+        self.outgoing = {}
+        self.incoming = {}
+        for s, p, o in triples:
+            if isinstance(s, BNode):
+                self.outgoing.setdefault(s, []).append((p, o))
+            if isinstance(o, BNode):
+                self.incoming.setdefault(o, []).append((s, p))
+        self.hashes = {}
+        self.keys = {}
+        self.labels = {}
+        self.counts = {}
+
+    def content_hash(self, node, visiting=frozenset()):
+        """The hash of the triples of node and of the blank nodes below it"""
+        if node in self.hashes:
+            return self.hashes[node]
+        if node in visiting:
+            # a cycle of blank nodes, the node is known by its position in the cycle only
+            return "cycle"
+        visiting = visiting | {node}
+        lines = sorted(
+            term_ntriples(p) + " " + (self.content_hash(o, visiting) if isinstance(o, BNode) else term_ntriples(o))
+            for p, o in self.outgoing.get(node, ())
+        )
+        digest = hashlib.sha256("\n".join(lines).encode("utf-8")).hexdigest()
+        self.hashes[node] = digest
+        return digest
+
+    def label(self, node, visiting=frozenset()):
+        if node in self.labels:
+            return self.labels[node]
+        if node in visiting:
+            return BNode("cycle")
+        visiting = visiting | {node}
+        references = sorted(
+            (term_ntriples(self.label(s, visiting) if isinstance(s, BNode) else s), term_ntriples(p))
+            for s, p in self.incoming.get(node, ())
+        )
+        key = hashlib.sha256(
+            "\n".join([self.content_hash(node)] + [" ".join(reference) for reference in references]).encode("utf-8")
+        ).hexdigest()[:32]
+        # nodes with the same content referenced the same way are interchangeable, any numbering gives equal output
+        count = self.counts.get(key, 0)
+        self.counts[key] = count + 1
+        label = self.labels[node] = BNode("c" + key + ("" if count == 0 else "_{}".format(count)))
+        return label
+
+    def term(self, term):
+        return self.label(term) if isinstance(term, BNode) else term
+
+
+def canonical_triples(triples, minted=()):
+    """
+    Returns the triples with content derived blank node labels, deduplicated and sorted by their N-Triples form
+
+    :param minted: the URIs minted at random among the triples, the hs_uid subjects of the models given none. They are
+        labelled from their content as blank nodes are, in the hsresource namespace
+    """
+    placeholders = {uri: BNode() for uri in minted}
+    if placeholders:
+        triples = ((placeholders.get(s, s), p, placeholders.get(o, o)) for s, p, o in triples)
+    triples = set(triples)
+    labeller = _Labeller(triples)
+    canonical = {(labeller.term(s), p, labeller.term(o)) for s, p, o in triples}
+    if placeholders:
+        uris = {
+            labeller.labels[node]: URIRef(str(HSRESOURCE) + str(labeller.labels[node]))
+            for node in placeholders.values()
+            if node in labeller.labels
+        }
+        canonical = {(uris.get(s, s), p, uris.get(o, o)) for s, p, o in canonical}
+    return sorted(canonical, key=triple_ntriples)
+
+
+def write_ntriples(triples):
+    """Returns the N-Triples document of the triples, in the order given"""
+    return "".join(triple_ntriples(triple) + "\n" for triple in triples)
@@ -0,0 +1,170 @@
+import inspect
+from datetime import date
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, FrozenSet, NamedTuple, Optional, Tuple, Type, Union
+
+from pydantic import AnyUrl, BaseModel
+from pydantic_core import PydanticUndefined, Url
+from rdflib import Literal, URIRef
+from typing_extensions import Annotated, get_origin
+
+from hsmodels.schemas.enums import ModelProgramFileType, TermEnum
+
+# the RDF fields the user model root validators build a user field from, the other user fields are read from the RDF
+# field of the same name. The url is built from the rdf_subject which is always loaded
+USER_FIELD_SOURCES = {
+    "created": ("dates",),
+    "modified": ("dates",),
+    "review_started": ("dates",),
+    "published": ("dates",),
+    "spatial_coverage": ("coverages",),
+    "period_coverage": ("coverages",),
+    "additional_metadata": ("extended_metadata",),
+    "abstract": ("description",),
+    "url": (),
+    "file_types": tuple(file_type.name for file_type in ModelProgramFileType),
+}
+
+
+class FieldPlan(NamedTuple):
+    """The RDF mapping of a single model field, resolved once from its annotation and json_schema_extra"""
+
+    name: str
+    predicate: URIRef
+    is_list: bool
+    nested_class: Optional[Type[BaseModel]]
+    coerce: Callable
+    # builds the RDF term of a value of the field, None for nested models which are written as nodes of their own
+    to_term: Optional[Callable]
+
+
+class ModelPlan(NamedTuple):
+    """The RDF mapping of a model, the fields are listed in declaration order"""
+
+    schema: Type[BaseModel]
+    rdf_type: Optional[URIRef]
+    fields: Tuple[FieldPlan, ...]
+    # every predicate declared on the model, including rdf_type and dc_type which are not parsed
+    known_predicates: FrozenSet[URIRef]
+    # (name, default) of the fields with a default other than None, the values a validated model would fill in
+    defaults: Tuple[Tuple[str, Any], ...]
+    # which of rdf_type, dc_type and label the model declares, those are written apart from the fields
+    type_fields: FrozenSet[str]
+
+
+def get_args(t):
+    return getattr(t, "__args__", None)
+
+
+def get_nested_class(field):
+    origin = field.annotation
+    if origin:
+        if inspect.isclass(origin) and issubclass(origin, BaseModel):
+            return origin
+        if get_args(origin):
+            clazz = get_args(origin)[0]
+            if inspect.isclass(clazz) and issubclass(clazz, BaseModel):
+                return clazz
+    return None
+
+
+def literal_to_str(value):
+    return str(value.toPython())
+
+
+def to_term(value):
+    """Returns the RDF term of a field value, for the values of fields whose annotation names no single type"""
+    if isinstance(value, (Url, AnyUrl)):
+        return URIRef(str(value))
+    if isinstance(value, TermEnum):
+        return URIRef(value.value)
+    if isinstance(value, Enum):
+        return Literal(value.value)
+    return Literal(value)
+
+
+@lru_cache(maxsize=4096)
+def _uri(value):
+    # rdflib checks every character of a URI on construction, the same URIs come up over and over in metadata
+    return URIRef(value)
+
+
+def _url_term(value):
+    return _uri(str(value))
+
+
+# the values of enum and str fields may be given as members or as their values, as validation accepts both
+def _term_enum_term(value):
+    return _uri(value.value if isinstance(value, Enum) else value)
+
+
+def _enum_term(value):
+    return Literal(value.value if isinstance(value, Enum) else value)
+
+
+def _str_term(value):
+    return Literal(value.value if isinstance(value, Enum) else value)
+
+
+def term_constructor(annotation):
+    """Chooses the RDF term constructor of the values of a field from its annotation"""
+    origin = get_origin(annotation)
+    if origin is Annotated or origin is list:
+        return term_constructor(get_args(annotation)[0])
+    if origin is Union:
+        types = [t for t in get_args(annotation) if t is not type(None)]
+        return term_constructor(types[0]) if len(types) == 1 else to_term
+    if inspect.isclass(annotation):
+        if issubclass(annotation, (Url, AnyUrl)):
+            return _url_term
+        if issubclass(annotation, TermEnum):
+            return _term_enum_term
+        if issubclass(annotation, Enum):
+            return _enum_term
+        if issubclass(annotation, str):
+            return _str_term
+        if issubclass(annotation, (int, float, date)):
+            return Literal
+    return to_term
+
+
+def _rdf_fields(schema):
+    for fname, finfo in schema.model_fields.items():
+        if fname not in ['rdf_subject', 'rdf_type', 'label', 'dc_type']:
+            predicate = None
+            if finfo.json_schema_extra:
+                predicate = finfo.json_schema_extra.get('rdf_predicate', None)
+            if not predicate:
+                raise Exception(
+                    "Schema configuration error for {}, all fields must specify a rdf_predicate".format(schema)
+                )
+            yield finfo, fname, predicate
+
+
+@lru_cache(maxsize=None)
+def model_plan(schema):
+    """
+    Compiles the RDF mapping of a pydantic model class, the plan is built on first use and cached per class
+
+    The plan serves both directions, parsing coerces values with coerce and serializing builds terms with to_term.
+    """
+    rdf_type = None
+    if 'rdf_type' in schema.model_fields:
+        rdf_type = schema.model_fields['rdf_type'].default
+    fields = []
+    defaults = []
+    for f, name, predicate in _rdf_fields(schema):
+        is_list = getattr(f.annotation, '__origin__', None) is list
+        nested_class = get_nested_class(f)
+        term = None if nested_class else term_constructor(f.annotation)
+        fields.append(FieldPlan(name, predicate, is_list, nested_class, literal_to_str, term))
+        if f.default is not None and f.default is not PydanticUndefined:
+            defaults.append((name, f.default))
+    known_predicates = frozenset(
+        finfo.json_schema_extra['rdf_predicate']
+        for finfo in schema.model_fields.values()
+        if finfo.json_schema_extra and 'rdf_predicate' in finfo.json_schema_extra
+    )
+    type_fields = frozenset(name for name in ('rdf_type', 'dc_type', 'label') if name in schema.model_fields)
+    return ModelPlan(schema, rdf_type, tuple(fields), known_predicates, tuple(defaults), type_fields)
@@ -0,0 +1,208 @@
+"""
+A streaming reader for the RDF/XML documents HydroShare writes (``*_meta.xml``, ``*_resmap.xml``).
+
+The reader walks the document with ``xml.etree.ElementTree.iterparse`` and indexes the triples by subject, skipping
+the rdflib triple store. It understands the striped RDF/XML syntax HydroShare produces: node elements (typed or
+``rdf:Description``) identified by ``rdf:about``/``rdf:nodeID`` or left blank, property elements with
+``rdf:resource``, ``rdf:nodeID``, ``rdf:datatype``, ``xml:lang``, ``rdf:parseType="Resource"`` or a nested node
+element, and property attributes. Any other construct raises UnsupportedRDFXML so the caller can fall back to rdflib.
+"""
+from io import BytesIO
+from urllib.parse import urlsplit
+from xml.etree.ElementTree import iterparse
+
+from rdflib import BNode, Literal, URIRef
+
+from hsmodels.namespaces import RDF, XML
+
+_RDF_NS = str(RDF)
+_RDF_ROOT = "{%s}RDF" % _RDF_NS
+_RDF_DESCRIPTION = "{%s}Description" % _RDF_NS
+_RDF_ABOUT = "{%s}about" % _RDF_NS
+_RDF_NODE_ID = "{%s}nodeID" % _RDF_NS
+_RDF_RESOURCE = "{%s}resource" % _RDF_NS
+_RDF_DATATYPE = "{%s}datatype" % _RDF_NS
+_RDF_PARSE_TYPE = "{%s}parseType" % _RDF_NS
+_XML_LANG = "{%s}lang" % XML
+
+# syntax names that may not be used as node or property elements
+_RDF_RESERVED = {"{%s}%s" % (_RDF_NS, name) for name in ("RDF", "ID", "about", "bagID", "parseType", "resource",
+                                                         "nodeID", "li", "aboutEach", "aboutEachPrefix", "datatype")}
+
+_NODE = 0
+_PROPERTY = 1
+_RESOURCE_PROPERTY = 2
+
+
+class UnsupportedRDFXML(Exception):
+    """Raised when a document uses RDF/XML syntax the streaming reader does not handle"""
+
+
+class TripleIndex:
+    """
+    The triples of a document indexed by subject and predicate.
+
+    Implements the subset of the rdflib Graph API used by hsmodels.schemas.load_rdf and parse_file.
+    """
+
+    def __init__(self):
+        self._subjects = {}
+        self._objects = set()
+        self._length = 0
+
+    def add(self, triple):
+        subject, predicate, value = triple
+        predicates = self._subjects.get(subject)
+        if predicates is None:
+            predicates = self._subjects[subject] = {}
+        values = predicates.get(predicate)
+        if values is None:
+            predicates[predicate] = [value]
+        elif value in values:
+            return
+        else:
+            values.append(value)
+        self._objects.add((predicate, value))
+        self._length += 1
+
+    def predicate_objects(self, subject):
+        for predicate, values in self._subjects.get(subject, {}).items():
+            for value in values:
+                yield predicate, value
+
+    def subject_objects(self, predicate):
+        for subject, predicates in self._subjects.items():
+            for value in predicates.get(predicate, ()):
+                yield subject, value
+
+    def value(self, subject=None, predicate=None, object=None):
+        if subject is not None:
+            values = self._subjects.get(subject, {}).get(predicate)
+            return values[0] if values else None
+        for subject, value in self.subject_objects(predicate):
+            if value == object:
+                return subject
+        return None
+
+    def __contains__(self, triple):
+        subject, predicate, value = triple
+        if subject is None:
+            return (predicate, value) in self._objects
+        return value in self._subjects.get(subject, {}).get(predicate, ())
+
+    def __len__(self):
+        return self._length
+
+
+def _uri(value):
+    if not urlsplit(value).scheme:
+        raise UnsupportedRDFXML("Relative URI references are not supported: {}".format(value))
+    return URIRef(value)
+
+
+def _predicate(tag):
+    if tag[0] != "{" or tag in _RDF_RESERVED:
+        raise UnsupportedRDFXML("Unsupported element {}".format(tag))
+    return URIRef(tag[1:].replace("}", "", 1))
+
+
+class _Reader:
+    def __init__(self):
+        self.index = TripleIndex()
+        self.node_ids = {}
+
+    def node_id(self, value):
+        node = self.node_ids.get(value)
+        if node is None:
+            node = self.node_ids[value] = BNode()
+        return node
+
+    def node(self, element, lang):
+        """Returns the subject of a node element, emitting its type and property attribute triples"""
+        subject = None
+        for name, value in element.attrib.items():
+            if name == _RDF_ABOUT:
+                subject = _uri(value)
+            elif name == _RDF_NODE_ID:
+                subject = self.node_id(value)
+        if subject is None:
+            subject = BNode()
+        if element.tag != _RDF_DESCRIPTION:
+            self.index.add((subject, RDF.type, _uri(_predicate(element.tag))))
+        for name, value in element.attrib.items():
+            if name in (_RDF_ABOUT, _RDF_NODE_ID, _XML_LANG):
+                continue
+            if name.startswith("{%s}" % XML):
+                raise UnsupportedRDFXML("Unsupported attribute {}".format(name))
+            predicate = _predicate(name)
+            if predicate == RDF.type:
+                self.index.add((subject, predicate, _uri(value)))
+            else:
+                self.index.add((subject, predicate, Literal(value, lang=lang)))
+        return subject
+
+    def read(self, source):
+        # each frame is [kind, subject, predicate, lang, has_object]
+        stack = []
+        for event, element in iterparse(source, events=("start", "end")):
+            if event == "start":
+                parent = stack[-1] if stack else None
+                lang = element.attrib.get(_XML_LANG, parent[3] if parent else None)
+                if parent is None and element.tag == _RDF_ROOT:
+                    stack.append([_PROPERTY, None, None, lang, False])
+                elif parent is None or parent[0] == _PROPERTY:
+                    subject = self.node(element, lang)
+                    if parent is not None and parent[2] is not None:
+                        if parent[4]:
+                            raise UnsupportedRDFXML("Property element {} has more than one value".format(parent[2]))
+                        parent[4] = True
+                        self.index.add((parent[1], parent[2], subject))
+                    stack.append([_NODE, subject, None, lang, False])
+                else:
+                    stack.append(self.property(parent[1], element, lang))
+                continue
+
+            kind, subject, predicate, lang, has_object = stack.pop()
+            if kind == _PROPERTY and predicate is not None and not has_object:
+                datatype = element.attrib.get(_RDF_DATATYPE)
+                text = element.text or ""
+                if datatype:
+                    self.index.add((subject, predicate, Literal(text, datatype=_uri(datatype))))
+                else:
+                    self.index.add((subject, predicate, Literal(text, lang=lang)))
+            element.clear()
+        return self.index
+
+    def property(self, subject, element, lang):
+        """Returns the stack frame of a property element, emitting its triple when the object is an attribute"""
+        predicate = _predicate(element.tag)
+        attributes = {name: value for name, value in element.attrib.items() if name != _XML_LANG}
+        if not attributes or list(attributes) == [_RDF_DATATYPE]:
+            return [_PROPERTY, subject, predicate, lang, False]
+        if len(attributes) == 1:
+            name, value = next(iter(attributes.items()))
+            if name == _RDF_RESOURCE:
+                self.index.add((subject, predicate, _uri(value)))
+                return [_PROPERTY, None, predicate, lang, True]
+            if name == _RDF_NODE_ID:
+                self.index.add((subject, predicate, self.node_id(value)))
+                return [_PROPERTY, None, predicate, lang, True]
+            if name == _RDF_PARSE_TYPE and value == "Resource":
+                node = BNode()
+                self.index.add((subject, predicate, node))
+                return [_RESOURCE_PROPERTY, node, None, lang, True]
+        raise UnsupportedRDFXML("Unsupported attributes {} on property element {}".format(list(attributes), predicate))
+
+
+def read_rdf_xml(source=None, data=None):
+    """
+    Reads an RDF/XML document into a TripleIndex.
+
+    :param source: a file path or a binary file object
+    :param data: the document as a str or bytes
+    :raises UnsupportedRDFXML: when the document uses syntax the reader does not handle
+    :raises xml.etree.ElementTree.ParseError: when the document is not well formed XML
+    """
+    if data is not None:
+        source = BytesIO(data.encode("utf-8") if isinstance(data, str) else data)
+    return _Reader().read(source)
@@ -28,7 +28,6 @@ from hsmodels.schemas.rdf.root_validators import (
 )
 from hsmodels.schemas.rdf.validators import (
     coverages_constraint,
-    coverages_spatial_constraint,
     dates_constraint,
     language_constraint,
     rdf_parse_identifier,
@@ -97,7 +96,6 @@ class BaseResource(BaseModel):
     _language_constraint = field_validator('language')(language_constraint)
     _dates_constraint = field_validator('dates')(dates_constraint)
     _coverages_constraint = field_validator('coverages')(coverages_constraint)
-    _coverages_spatial_constraint = field_validator('coverages')(coverages_spatial_constraint)
     _sort_creators = field_validator("creators")(sort_creators)
 
 
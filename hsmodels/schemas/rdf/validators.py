@@ -2,7 +2,7 @@ from pydantic import AnyUrl
 from pydantic_core import Url
 
 from hsmodels.schemas.enums import CoverageType, DateType
-from hsmodels.schemas.languages_iso import languages
+from hsmodels.schemas.vocabulary import vocabulary
 
 
 def rdf_parse_extended_metadata(cls, value):
@@ -32,40 +32,39 @@ def subjects_constraint(cls, subjects):
 
 
 def language_constraint(cls, language):
-    if language not in [code for code, verbose in languages]:
+    if language not in vocabulary().language_names:
         raise ValueError("language '{}' must be a 3 letter iso language code".format(language))
     return language
 
 
 def dates_constraint(cls, dates):
+    """Checks in one pass that there is a single created and a single modified date, modified no earlier"""
     assert len(dates) >= 2
-    created = list(filter(lambda d: d.type == DateType.created, dates))
+    created = []
+    modified = []
+    for date in dates:
+        if date.type == DateType.created:
+            created.append(date)
+        elif date.type == DateType.modified:
+            modified.append(date)
     assert len(created) == 1
-    created = created[0]
-    modified = list(filter(lambda d: d.type == DateType.modified, dates))
     assert len(modified) == 1
-    modified = modified[0]
 
-    assert modified.value >= created.value
+    assert modified[0].value >= created[0].value
     return dates
 
 
 def coverages_constraint(cls, coverages):
-    def one_or_none_of_type(type):
-        cov = list(filter(lambda d: d.type == type, coverages))
-        assert len(cov) <= 1
-
-    one_or_none_of_type(CoverageType.point)
-    one_or_none_of_type(CoverageType.period)
-    one_or_none_of_type(CoverageType.box)
-    return coverages
-
-
-def coverages_spatial_constraint(cls, coverages):
-    contains_point = any(c for c in coverages if c.type == CoverageType.point)
-    contains_box = any(c for c in coverages if c.type == CoverageType.box)
-    if contains_point:
-        assert not contains_box, "Only one type of spatial coverage is allowed, point or box"
+    """Checks in one pass that there is at most one coverage of each type, and not both a point and a box"""
+    counts = {CoverageType.point: 0, CoverageType.period: 0, CoverageType.box: 0}
+    for coverage in coverages:
+        if coverage.type in counts:
+            counts[coverage.type] += 1
+    assert counts[CoverageType.point] <= 1
+    assert counts[CoverageType.period] <= 1
+    assert counts[CoverageType.box] <= 1
+    if counts[CoverageType.point]:
+        assert not counts[CoverageType.box], "Only one type of spatial coverage is allowed, point or box"
     return coverages
 
 
@@ -77,18 +76,17 @@ def sort_creators(cls, creators):
             creator["creator_order"] = index + 1
         return creators
     else:
-        # assign creator_order to creators that don't have it
-        creator_order_numbers = [c.creator_order for c in creators if c.creator_order is not None]
-        if creator_order_numbers:
-            #if len(creator_order_numbers) != len(set(creator_order_numbers)):
-            #    raise ValueError("creator_order values must be unique")
-            max_order_number = max(creator_order_numbers)
-        else:
-            max_order_number = 0
-
-        creators_without_order = [c for c in creators if c.creator_order is None]
+        # assign creator_order to creators that don't have it, numbered after the highest creator_order
+        max_order_number = 0
+        creators_without_order = []
+        for creator in creators:
+            if creator.creator_order is None:
+                creators_without_order.append(creator)
+            elif creator.creator_order > max_order_number:
+                max_order_number = creator.creator_order
         for index, creator in enumerate(creators_without_order):
             creator.creator_order = max_order_number + index + 1
+        # sorted runs in linear time on creators already in order
         return sorted(creators, key=lambda _creator: _creator.creator_order)
 
 
@@ -0,0 +1,220 @@
+"""
+A writer of RDF/XML documents in the nested layout HydroShare stores metadata in.
+
+Triples are grouped by subject and every node is written once: the objects with triples of their own are nested in
+the property element referencing them the first time they are seen, in the style of rdflib's pretty-xml serializer.
+Predicates and types are written with the prefixes of hsmodels.namespaces, namespaces unknown to hsmodels get ns1,
+ns2, ... prefixes.
+"""
+import re
+from functools import lru_cache
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from rdflib import BNode, Literal, Namespace, URIRef
+
+from hsmodels import namespaces
+from hsmodels.namespaces import RDF, XML
+
+# rdflib builds a new URIRef on every attribute access of a Namespace
+_RDF_TYPE = RDF.type
+_NCNAME = re.compile(r"^[^\W\d][\w.\-]*$")
+_ATTRIBUTE_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#9;"}
+
+
+def _known_namespaces():
+    prefixes = {}
+    # sorted so RDFS wins over its alias RDFS1
+    for name in sorted(vars(namespaces), key=lambda name: (not name.isalpha(), name)):
+        namespace = getattr(namespaces, name)
+        if isinstance(namespace, Namespace) and namespace != XML and str(namespace) not in prefixes:
+            prefixes[str(namespace)] = name.lower()
+    return prefixes
+
+
+KNOWN_NAMESPACES = _known_namespaces()
+# the namespaces longest first so the most specific one wins
+_NAMESPACES_BY_LENGTH = sorted(KNOWN_NAMESPACES, key=len, reverse=True)
+
+
+@lru_cache(maxsize=4096)
+def split_uri(uri):
+    """Splits a URI into a namespace and a local name usable in an XML qualified name"""
+    for namespace in _NAMESPACES_BY_LENGTH:
+        if uri.startswith(namespace) and _NCNAME.match(uri[len(namespace) :]):
+            return namespace, uri[len(namespace) :]
+    for index in range(len(uri) - 1, -1, -1):
+        if uri[index] in "#/:" and _NCNAME.match(uri[index + 1 :]):
+            return uri[: index + 1], uri[index + 1 :]
+    raise Exception("Can not write {} as an XML qualified name".format(uri))
+
+
+def _attribute(value):
+    return '"' + escape(value, _ATTRIBUTE_ENTITIES) + '"'
+
+
+class NestedNodes:
+    """
+    Triples grouped by subject, for the writers nesting every node once in the first property referencing it.
+
+    The RDF/XML writer and the JSON-LD documents share the layout: the nodes nobody references are written at the top,
+    a node is nested the first time it is referenced, and a blank node nested in its only reference needs no label.
+    """
+
+    def __init__(self):
+        self.subjects = {}
+        self.references = {}
+        self._triples = set()
+
+    def add(self, triple):
+        if triple in self._triples:
+            return
+        self._triples.add(triple)
+        subject, predicate, value = triple
+        properties = self.subjects.get(subject)
+        if properties is None:
+            properties = self.subjects[subject] = []
+        properties.append((predicate, value))
+        if not isinstance(value, Literal):
+            self.references[value] = self.references.get(value, 0) + 1
+
+    def top_nodes(self, written):
+        """Yields the subjects to write at the top, written is the set of the nodes written so far"""
+        # the nodes nobody references first, then whatever a cycle or a shared node left out
+        for subject in self.subjects:
+            if subject not in self.references:
+                yield subject
+        for subject in self.subjects:
+            if subject not in written:
+                yield subject
+
+    def nests(self, value, written):
+        """Whether the node of a value is written in the property referencing it"""
+        return value in self.subjects and value not in written
+
+    def labelled(self, subject, nested):
+        """Whether a blank node is written with its label"""
+        return not nested or self.references[subject] > 1
+
+
+class RDFXMLWriter:
+    """
+    Writes triples as an RDF/XML document.
+
+    Triples are added with add or add_triples, the document is produced by serialize.
+    """
+
+    def __init__(self):
+        self._nodes = NestedNodes()
+        self._prefixes = {str(RDF): "rdf"}
+
+    def add(self, triple):
+        self._nodes.add(triple)
+
+    def add_triples(self, triples):
+        for triple in triples:
+            self.add(triple)
+        return self
+
+    def serialize(self):
+        """Returns the RDF/XML document of the triples added"""
+        return "\n".join(self._document()) + "\n"
+
+    def write(self, fp):
+        """Writes the RDF/XML document of the triples added to a binary file-like object, in UTF-8"""
+        write_lines(fp, self._document())
+
+    def _document(self):
+        # the prefixes are declared on the root element, they are all assigned before the first line is yielded
+        self._assign_prefixes()
+        yield '<?xml version="1.0" encoding="utf-8"?>'
+        yield "<rdf:RDF"
+        for namespace, prefix in sorted(self._prefixes.items(), key=lambda item: item[1]):
+            yield "  xmlns:{}={}".format(prefix, _attribute(namespace))
+        yield ">"
+
+        written = set()
+        for subject in self._nodes.top_nodes(written):
+            yield from self._node(subject, written, 1)
+        yield "</rdf:RDF>"
+
+    def _assign_prefixes(self):
+        for properties in self._nodes.subjects.values():
+            self._element(properties)
+            for predicate, value in properties:
+                self._qname(predicate)
+
+    def _qname(self, uri):
+        namespace, local = split_uri(str(uri))
+        prefix = self._prefixes.get(namespace)
+        if prefix is None:
+            prefix = KNOWN_NAMESPACES.get(namespace)
+            if prefix is None or prefix in self._prefixes.values():
+                prefix = "ns{}".format(len(self._prefixes))
+            self._prefixes[namespace] = prefix
+        return "{}:{}".format(prefix, local)
+
+    def _element(self, properties):
+        """Returns the element name of a node and the type it stands for, rdf:Description and None for no type"""
+        for predicate, value in properties:
+            if predicate == _RDF_TYPE and isinstance(value, URIRef):
+                try:
+                    return self._qname(value), value
+                except Exception:
+                    pass
+                break
+        return "rdf:Description", None
+
+    def _node(self, subject, written, depth, nested=False):
+        written.add(subject)
+        indent = "  " * depth
+        properties = self._nodes.subjects.get(subject, ())
+        element, node_type = self._element(properties)
+
+        if isinstance(subject, BNode):
+            identifier = " rdf:nodeID=" + _attribute(str(subject)) if self._nodes.labelled(subject, nested) else ""
+        else:
+            identifier = " rdf:about=" + _attribute(str(subject))
+        yield "{}<{}{}>".format(indent, element, identifier)
+        for predicate, value in properties:
+            if predicate == _RDF_TYPE and value == node_type:
+                node_type = None
+                continue
+            yield from self._property(predicate, value, written, depth + 1)
+        yield "{}</{}>".format(indent, element)
+
+    def _property(self, predicate, value, written, depth):
+        indent = "  " * depth
+        qname = self._qname(predicate)
+        if isinstance(value, Literal):
+            attributes = ""
+            if value.language:
+                attributes += " xml:lang=" + _attribute(value.language)
+            if value.datatype:
+                attributes += " rdf:datatype=" + _attribute(str(value.datatype))
+            yield "{}<{}{}>{}</{}>".format(indent, qname, attributes, escape(str(value)), qname)
+        elif self._nodes.nests(value, written):
+            yield "{}<{}>".format(indent, qname)
+            yield from self._node(value, written, depth + 1, nested=True)
+            yield "{}</{}>".format(indent, qname)
+        elif isinstance(value, BNode):
+            yield "{}<{} rdf:nodeID={}/>".format(indent, qname, _attribute(str(value)))
+        else:
+            yield "{}<{} rdf:resource={}/>".format(indent, qname, _attribute(str(value)))
+
+
+def write_rdf_xml(triples):
+    """Returns the RDF/XML document of an iterable of triples, an rdflib Graph or iter_triples for instance"""
+    return RDFXMLWriter().add_triples(triples).serialize()
+
+
+def write_lines(fp, lines, chunk_size=1024):
+    """
+    Writes an iterable of lines of text to a binary file-like object in UTF-8, encoding chunk_size lines at a time
+    """
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        fp.write(("\n".join(chunk) + "\n").encode("utf-8"))
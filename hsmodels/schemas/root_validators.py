@@ -1,36 +1,29 @@
 from pydantic_core import Url
 from rdflib import URIRef
 
-from hsmodels.schemas.enums import CoverageType, DateType, ModelProgramFileType, RelationType, UserIdentifierType
+from hsmodels.schemas.vocabulary import term_value, vocabulary
 from hsmodels.utils import to_coverage_dict
 
 
 def split_dates(cls, values):
     if "dates" in values:
+        date_fields = vocabulary().date_fields
         for date in values['dates']:
-            if date['type'] == DateType.created:
-                values["created"] = date['value']
-            elif date['type'] == DateType.modified:
-                values["modified"] = date['value']
-            elif date['type'] == DateType.review_started:
-                values["review_started"] = date['value']
-            elif date['type'] == DateType.published:
-                values["published"] = date['value']
+            field = date_fields.get(term_value(date['type']))
+            if field is not None:
+                values[field] = date['value']
         del values["dates"]
     return values
 
 
 def split_coverages(cls, values):
-    from hsmodels.schemas.fields import BoxCoverage, PeriodCoverage, PointCoverage
-
     if "coverages" in values:
+        coverage_fields = vocabulary().coverage_fields
         for coverage in values['coverages']:
-            if coverage['type'] == CoverageType.period:
-                values["period_coverage"] = PeriodCoverage(**to_coverage_dict(coverage['value']))
-            elif coverage['type'] == CoverageType.box:
-                values["spatial_coverage"] = BoxCoverage(**to_coverage_dict(coverage['value']))
-            elif coverage['type'] == CoverageType.point:
-                values["spatial_coverage"] = PointCoverage(**to_coverage_dict(coverage['value']))
+            field = coverage_fields.get(term_value(coverage['type']))
+            if field is not None:
+                name, coverage_model = field
+                values[name] = coverage_model(**to_coverage_dict(coverage['value']))
         del values["coverages"]
     return values
 
@@ -82,33 +75,35 @@ def parse_url(cls, values):
 def parse_relation(cls, values):
     if "type" in values or "value" in values:
         return values
-    for relation_type in RelationType:
-        if relation_type.name in values and values[relation_type.name]:
-            values["type"] = relation_type
-            values["value"] = values[relation_type.name]
+    relation_types = vocabulary().relation_types
+    for name in relation_types.names_in(values):
+        if values[name]:
+            values["type"] = relation_types.by_name[name]
+            values["value"] = values[name]
             return values
 
 
 def group_user_identifiers(cls, values):
     if "identifiers" not in values:
+        identifier_types = vocabulary().user_identifier_types
         identifiers = {}
-        for identifier in UserIdentifierType:
-            if identifier.name in values and values[identifier.name]:
-                identifiers[identifier] = values[identifier.name]
+        for name in identifier_types.names_in(values):
+            if values[name]:
+                identifiers[identifier_types.by_name[name]] = values[name]
         values["identifiers"] = identifiers
     return values
 
 
 def parse_file_types(cls, values):
     if "file_types" not in values:
+        file_types = vocabulary().model_program_file_types
         file_types_list = []
-        for file_type in ModelProgramFileType:
-            if file_type.name in values:
-                ftypes = values[file_type.name]
-                if isinstance(ftypes, list):
-                    for ftype in ftypes:
-                        file_types_list.append({"type": file_type, "url": ftype})
-                    del values[file_type.name]
+        for name in file_types.names_in(values):
+            ftypes = values[name]
+            if isinstance(ftypes, list):
+                for ftype in ftypes:
+                    file_types_list.append({"type": file_types.by_name[name], "url": ftype})
+                del values[name]
         values['file_types'] = file_types_list
     return values
 
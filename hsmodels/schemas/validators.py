@@ -3,7 +3,7 @@ from hsmodels.utils import to_coverage_dict
 
 
 def parse_spatial_reference(cls, value):
-    if not value:
+    if not isinstance(value, dict):
         return value
     # This is a workaround for form submissions that do not include type
     if isinstance(value, dict) and "type" not in value:
@@ -20,6 +20,8 @@ def parse_spatial_reference(cls, value):
 
 
 def parse_multidimensional_spatial_reference(cls, value):
+    if not isinstance(value, dict):
+        return value
     # This is a workaround for form submissions that do not include type
     if isinstance(value, dict) and "type" not in value:
         value["type"] = "box"
@@ -0,0 +1,94 @@
+"""
+Hash indexes of the controlled vocabularies the validators look terms up in.
+
+The indexes are built on the first call of vocabulary and shared from then on, they are read only mappings so no
+validator can change them for the others.
+"""
+from enum import Enum
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Tuple
+
+from hsmodels.schemas.enums import CoverageType, DateType, ModelProgramFileType, RelationType, UserIdentifierType
+
+
+class EnumIndex(NamedTuple):
+    """The members of an Enum by name and by value"""
+
+    by_name: Mapping[str, Enum]
+    by_value: Mapping[str, Enum]
+    # the position of each name in the Enum, to keep the members found in the order the Enum declares them
+    positions: Mapping[str, int]
+
+    @classmethod
+    def of(cls, enum):
+        members = list(enum)
+        return cls(
+            MappingProxyType({member.name: member for member in members}),
+            MappingProxyType({member.value: member for member in members}),
+            MappingProxyType({member.name: position for position, member in enumerate(members)}),
+        )
+
+    def names_in(self, keys):
+        """Returns the member names among keys, in the order of the Enum"""
+        names = [key for key in keys if key in self.by_name]
+        if len(names) > 1:
+            names.sort(key=self.positions.__getitem__)
+        return names
+
+
+class Vocabulary(NamedTuple):
+    """The controlled vocabularies of the metadata models"""
+
+    # the iso 639-2 code to language name, and back
+    language_names: Mapping[str, str]
+    language_codes: Mapping[str, str]
+    relation_types: EnumIndex
+    user_identifier_types: EnumIndex
+    model_program_file_types: EnumIndex
+    date_types: EnumIndex
+    coverage_types: EnumIndex
+    # the user model field a DateType value is split into
+    date_fields: Mapping[str, str]
+    # the user model field and field model a CoverageType value is split into
+    coverage_fields: Mapping[str, Tuple[str, type]]
+
+
+def term_value(term):
+    """Returns the string an Enum member, URIRef or str term is indexed by"""
+    # str Enums hash by their name and rdflib terms by their type and value, neither hash as the str they equal
+    if isinstance(term, Enum):
+        return term.value
+    return str(term)
+
+
+@lru_cache(maxsize=None)
+def vocabulary():
+    """Returns the Vocabulary, built on the first call"""
+    from hsmodels.schemas.fields import BoxCoverage, PeriodCoverage, PointCoverage
+    from hsmodels.schemas.languages_iso import languages
+
+    return Vocabulary(
+        language_names=MappingProxyType(dict(languages)),
+        language_codes=MappingProxyType({name: code for code, name in languages}),
+        relation_types=EnumIndex.of(RelationType),
+        user_identifier_types=EnumIndex.of(UserIdentifierType),
+        model_program_file_types=EnumIndex.of(ModelProgramFileType),
+        date_types=EnumIndex.of(DateType),
+        coverage_types=EnumIndex.of(CoverageType),
+        date_fields=MappingProxyType(
+            {
+                DateType.created.value: "created",
+                DateType.modified.value: "modified",
+                DateType.review_started.value: "review_started",
+                DateType.published.value: "published",
+            }
+        ),
+        coverage_fields=MappingProxyType(
+            {
+                CoverageType.period.value: ("period_coverage", PeriodCoverage),
+                CoverageType.box.value: ("spatial_coverage", BoxCoverage),
+                CoverageType.point.value: ("spatial_coverage", PointCoverage),
+            }
+        ),
+    )
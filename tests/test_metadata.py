@@ -1,21 +1,60 @@
+import copy
+import io
+import json
+import logging
 import os
+import pathlib
+import pickle
+import types
 from datetime import datetime
 
 import pytest
-from rdflib import Graph
-from rdflib.compare import _squashed_graphs_triples
-
-from hsmodels.namespaces import RDF
-from hsmodels.schemas import load_rdf, rdf_graph
-from hsmodels.schemas.enums import RelationType, UserIdentifierType
-from hsmodels.schemas.fields import BoxCoverage, PeriodCoverage, PointCoverage
+from pydantic import ValidationError
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.compare import _squashed_graphs_triples, isomorphic
+
+from hsmodels.namespaces import DC, DCTERMS, HSTERMS, ORE, RDF
+from hsmodels.schemas import (
+    CacheInfo,
+    ExportedFile,
+    LazyMetadata,
+    ParseCache,
+    bag_files,
+    export_bag,
+    iter_triples,
+    jsonld_document,
+    jsonld_string,
+    load_rdf,
+    load_rdf_lazy,
+    load_rdf_many,
+    parse_file,
+    rdf_graph,
+    rdf_graph_many,
+    rdf_string,
+    rdf_string_many,
+    rdf_write,
+    user_schemas,
+)
+from hsmodels.schemas.enums import DateType, RelationType, UserIdentifierType
+from hsmodels.schemas.fields import BoxCoverage, Creator, PeriodCoverage, PointCoverage
+from hsmodels.schemas.rdf.canonical import canonical_triples, write_ntriples
+from hsmodels.schemas.rdf.fields import CreatorInRDF, DateInRDF
+from hsmodels.schemas.rdf.plans import model_plan
+from hsmodels.schemas.rdf.reader import UnsupportedRDFXML, read_rdf_xml
+from hsmodels.schemas.rdf.resource import FileMap, ResourceMap, ResourceMetadataInRDF
+from hsmodels.schemas.rdf.writer import write_lines
 from hsmodels.utils import to_coverage_dict
 
 
 @pytest.fixture()
-def res_md():
+def res_md_rdf():
     with open("data/metadata/resourcemetadata.xml", 'r') as f:
-        return load_rdf(f.read())
+        return f.read()
+
+
+@pytest.fixture()
+def res_md(res_md_rdf):
+    return load_rdf(res_md_rdf)
 
 
 @pytest.fixture()
@@ -192,3 +231,576 @@ def test_resource_metadata(res_md):
         res_md.publisher.name == "Consortium of Universities for the Advancement of Hydrologic Science, Inc. (CUAHSI)"
     )
     assert str(res_md.publisher.url) == "https://www.cuahsi.org/"
+
+
+def test_load_rdf_multiple_root_types():
+    g = Graph()
+    for metadata_file in ['resourcemetadata.xml', 'singlefile_meta.xml']:
+        g.parse(os.path.join('data', 'metadata', metadata_file))
+    with pytest.raises(Exception) as e:
+        load_rdf(g.serialize(format='xml').decode())
+    assert "Found more than one root type" in str(e.value)
+    assert str(HSTERMS.CompositeResource) in str(e.value)
+    assert str(HSTERMS.SingleFileAggregation) in str(e.value)
+
+
+def test_load_rdf_constraint_errors():
+    g = Graph()
+    g.parse(os.path.join('data', 'metadata', 'resourcemetadata.xml'))
+    modified = next(g.subjects(RDF.type, DCTERMS.modified))
+    g.remove((None, None, modified))
+    with pytest.raises(ValidationError) as e:
+        load_rdf(g.serialize(format='xml').decode())
+    assert e.value.title == "ResourceMetadataInRDF"
+    assert [(error["loc"], error["type"]) for error in e.value.errors()] == [(("dates",), "assertion_error")]
+
+
+def test_load_rdf_subject_with_two_root_types():
+    g = Graph()
+    g.parse(os.path.join('data', 'metadata', 'resourcemetadata.xml'))
+    subject = next(g.subjects(RDF.type, HSTERMS.CompositeResource))
+    g.add((subject, RDF.type, HSTERMS.CollectionResource))
+    with pytest.raises(Exception) as e:
+        load_rdf(g.serialize(format='xml').decode())
+    assert "Found more than one root type" in str(e.value)
+    assert str(HSTERMS.CollectionResource) in str(e.value)
+
+
+def test_load_rdf_resource_map_with_typed_aggregation():
+    resource_map = ResourceMap(
+        describes=FileMap(
+            is_documented_by="http://www.hydroshare.org/resource/abc/data/contents/file_meta.xml",
+            is_described_by="http://www.hydroshare.org/resource/abc/data/contents/file_resmap.xml",
+            title="file",
+        ),
+        identifier="abc",
+    )
+    g = rdf_graph(resource_map)
+    g.add((resource_map.describes.rdf_subject, RDF.type, HSTERMS.SingleFileAggregation))
+    loaded = load_rdf(g.serialize(format='xml').decode())
+    assert isinstance(loaded, ResourceMap)
+    assert loaded.identifier == "abc"
+    assert loaded.describes.title == "file"
+
+
+def test_load_rdf_resource_map_with_typed_aggregated_node():
+    resource_map = ResourceMap(
+        describes=FileMap(
+            is_documented_by="http://www.hydroshare.org/resource/abc/data/resourcemetadata.xml",
+            is_described_by="http://www.hydroshare.org/resource/abc/data/resourcemap.xml",
+            title="resource",
+            files=["http://www.hydroshare.org/resource/abc/data/contents/test_resmap.xml#aggregation"],
+        ),
+        identifier="abc",
+    )
+    g = rdf_graph(resource_map)
+    aggregation = URIRef("http://www.hydroshare.org/resource/abc/data/contents/test_resmap.xml#aggregation")
+    g.add((aggregation, RDF.type, HSTERMS.GeographicRasterAggregation))
+    g.add((aggregation, ORE.isAggregatedBy, resource_map.describes.rdf_subject))
+    loaded = load_rdf(g.serialize(format='xml').decode())
+    assert isinstance(loaded, ResourceMap)
+    assert loaded.describes.files == resource_map.describes.files
+
+
+def test_model_plan():
+    plan = model_plan(ResourceMetadataInRDF)
+    assert plan is model_plan(ResourceMetadataInRDF)
+    assert plan.rdf_type == HSTERMS.CompositeResource
+    fields = {field.name: field for field in plan.fields}
+    assert 'rdf_subject' not in fields
+    assert fields['creators'].predicate == DC.creator
+    assert fields['creators'].is_list
+    assert fields['creators'].nested_class is CreatorInRDF
+    assert fields['title'].predicate == DC.title
+    assert not fields['title'].is_list
+    assert fields['title'].nested_class is None
+    assert fields['creators'].to_term is None
+    assert fields['title'].to_term("title") == Literal("title")
+    assert plan.type_fields == {'rdf_type', 'dc_type', 'label'}
+    dates = {field.name: field for field in model_plan(DateInRDF).fields}
+    assert dates['type'].to_term(DateType.created) == URIRef(DateType.created.value)
+
+
+def test_parse_logs_unknown_predicates(caplog):
+    g = Graph().parse(os.path.join('data', 'metadata', 'resourcemetadata.xml'))
+    subject = g.value(predicate=RDF.type, object=HSTERMS.CompositeResource)
+    g.add((subject, HSTERMS.unknownTerm, Literal("unknown")))
+    with caplog.at_level(logging.DEBUG, logger="hsmodels.schemas"):
+        md = load_rdf(g.serialize(format='xml').decode())
+    assert md.title == "sadfadsgasdf"
+    assert str(HSTERMS.unknownTerm) in caplog.text
+    assert str(RDF.type) not in caplog.text
+
+
+@pytest.mark.parametrize("metadata_file", metadata_files)
+def test_load_rdf_native_reader(metadata_file):
+    metadata_file = os.path.join('data', 'metadata', metadata_file)
+    with open(metadata_file, 'r') as f:
+        rdf_str = f.read()
+    md = load_rdf(rdf_str, native=True)
+    assert type(md) is type(load_rdf(rdf_str))
+    compare_metadatas(rdf_graph(md), metadata_file)
+
+
+def test_parse_file_native_reader():
+    metadata_file = os.path.join('data', 'metadata', 'resourcemetadata.xml')
+    md = parse_file(ResourceMetadataInRDF, metadata_file, native=True)
+    assert md.title == "sadfadsgasdf"
+    compare_metadatas(rdf_graph(md), metadata_file)
+
+
+def test_native_reader_falls_back_to_rdflib():
+    with open(os.path.join('data', 'metadata', 'singlefile_meta.xml'), 'r') as f:
+        rdf_str = f.read()
+    rdf_str = rdf_str.replace(
+        "<dc:title>", "<dcterms:isReferencedBy rdf:parseType=\"Literal\"><b>xml</b></dcterms:isReferencedBy><dc:title>"
+    )
+    with pytest.raises(UnsupportedRDFXML):
+        read_rdf_xml(data=rdf_str)
+    compare_graphs(rdf_graph(load_rdf(rdf_str, native=True)), rdf_graph(load_rdf(rdf_str)))
+
+
+@pytest.mark.parametrize("metadata_file", metadata_files)
+def test_load_rdf_matches_rdf_model(metadata_file):
+    # the user model is validated straight from the parsed graph, it must match the one built from the *InRDF model
+    metadata_file = os.path.join('data', 'metadata', metadata_file)
+    with open(metadata_file, 'r') as f:
+        md = load_rdf(f.read(), native=True)
+    rdf_schema = next(rdf_schema for rdf_schema, schema in user_schemas.items() if schema is type(md))
+    rdf_md = parse_file(rdf_schema, metadata_file, native=True)
+    assert md == type(md)(**rdf_md.model_dump(exclude_none=True))
+
+
+def test_load_rdf_orders_creators(res_md_rdf):
+    rdf_str = res_md_rdf.replace(
+        '<hsterms:creatorOrder rdf:datatype="http://www.w3.org/2001/XMLSchema#integer">1</hsterms:creatorOrder>', ''
+    )
+    md = load_rdf(rdf_str)
+    assert [creator.name for creator in md.creators] == [
+        "Tseganeh Z. Gichamo",
+        "Scott s Black",
+        "Horsburgh, Jeffery S.",
+    ]
+
+
+def test_load_rdf_validates_dates(res_md_rdf):
+    rdf_str = res_md_rdf.replace("dcterms:created", "dcterms:dateAccepted")
+    with pytest.raises(ValueError):
+        load_rdf(rdf_str)
+
+
+@pytest.mark.parametrize("metadata_file", metadata_files)
+def test_load_rdf_lazy(metadata_file):
+    metadata_file = os.path.join('data', 'metadata', metadata_file)
+    with open(metadata_file, 'r') as f:
+        rdf_str = f.read()
+    md = load_rdf(rdf_str, native=True)
+    lazy_md = load_rdf_lazy(rdf_str, native=True)
+    assert lazy_md.model_class is type(md)
+    for name in type(md).model_fields:
+        assert getattr(lazy_md, name) == getattr(md, name)
+    assert lazy_md.model_dump() == md.model_dump()
+    compare_metadatas(rdf_graph(lazy_md), metadata_file)
+
+
+def test_load_rdf_lazy_loads_fields_on_access(res_md_rdf):
+    # an invalid email of one creator fails the creators only
+    lazy_md = load_rdf_lazy(res_md_rdf.replace("jeff.horsburgh@usu.edu", "not an email"))
+    assert lazy_md.title == "sadfadsgasdf"
+    assert lazy_md.modified == datetime.fromisoformat("2020-11-13T19:40:57.276064+00:00")
+    assert lazy_md.subjects is lazy_md.subjects
+    with pytest.raises(ValidationError):
+        lazy_md.creators
+    with pytest.raises(ValidationError):
+        lazy_md.materialize()
+
+
+def test_load_rdf_lazy_materializes_on_assignment(res_md_rdf):
+    lazy_md = load_rdf_lazy(res_md_rdf)
+    lazy_md.title = "new title"
+    assert lazy_md.title == "new title"
+    assert lazy_md.materialize().title == "new title"
+    assert (None, DC.title, Literal("new title")) in rdf_graph(lazy_md)
+
+
+@pytest.mark.parametrize("copier", [copy.copy, copy.deepcopy, lambda md: pickle.loads(pickle.dumps(md))])
+def test_load_rdf_lazy_copies(copier, res_md_rdf):
+    lazy_md = load_rdf_lazy(res_md_rdf)
+    assert lazy_md.title == "sadfadsgasdf"
+    copied = copier(lazy_md)
+    assert isinstance(copied, LazyMetadata)
+    assert copied.title == "sadfadsgasdf"
+    # the graph a pickled document is read from may list the subjects in another order
+    assert isomorphic(rdf_graph(copied), rdf_graph(lazy_md))
+    copied.title = "new title"
+    assert lazy_md.title == "sadfadsgasdf"
+
+
+def test_parse_cache(tmp_path, res_md_rdf):
+    with open(os.path.join('data', 'metadata', 'singlefile_meta.xml'), 'r') as f:
+        single_str = f.read()
+
+    cache = ParseCache(maxsize=1, directory=str(tmp_path))
+    md = cache.load_rdf(res_md_rdf, native=True)
+    assert md == load_rdf(res_md_rdf, native=True)
+    md.title = "changed"
+    assert cache.load_rdf(res_md_rdf).title == "sadfadsgasdf"
+    assert cache.cache_info() == CacheInfo(hits=1, misses=1, evictions=0, disk_hits=0, maxsize=1, currsize=1)
+
+    cache.load_rdf(single_str)
+    assert cache.cache_info().evictions == 1
+    assert cache.load_rdf(res_md_rdf).title == "sadfadsgasdf"
+    assert cache.cache_info() == CacheInfo(hits=2, misses=2, evictions=2, disk_hits=1, maxsize=1, currsize=1)
+
+    restarted = ParseCache(directory=str(tmp_path))
+    assert restarted.load_rdf(single_str) == cache.load_rdf(single_str)
+    assert restarted.load_rdf(res_md_rdf, native=True) == cache.load_rdf(res_md_rdf)
+    assert restarted.cache_info().disk_hits == 2
+    assert restarted.cache_info().misses == 0
+
+
+def test_parse_cache_parse_file():
+    metadata_file = os.path.join('data', 'metadata', 'resourcemetadata.xml')
+    cache = ParseCache(copy=False)
+    md = cache.parse_file(ResourceMetadataInRDF, metadata_file)
+    assert cache.parse_file(ResourceMetadataInRDF, metadata_file) is md
+    with open(metadata_file, 'rb') as f:
+        assert cache.parse_file(ResourceMetadataInRDF, f) is md
+    assert cache.cache_info().hits == 2
+    compare_metadatas(rdf_graph(md), metadata_file)
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_load_rdf_many(workers):
+    metadata_files_paths = [os.path.join('data', 'metadata', metadata_file) for metadata_file in metadata_files]
+    sources = []
+    for metadata_file in metadata_files_paths:
+        with open(metadata_file, 'r') as f:
+            sources.append(f.read())
+    sources.insert(2, "<rdf:RDF")
+    sources.append(pathlib.Path(metadata_files_paths[0]))
+
+    results = list(load_rdf_many(sources, workers=workers, chunksize=2, native=True))
+    assert [result.index for result in results] == list(range(len(sources)))
+    assert results[2].model is None
+    assert results[2].error.startswith("SAXParseException")
+    for result, metadata_file in zip(results[:2] + results[3:], metadata_files_paths + metadata_files_paths[:1]):
+        assert result.error is None
+        compare_metadatas(rdf_graph(result.model), metadata_file)
+
+    unordered = list(load_rdf_many(sources, workers=workers, chunksize=2, ordered=False, native=True))
+    assert sorted(result.index for result in unordered) == list(range(len(sources)))
+
+
+@pytest.mark.parametrize("metadata_file", metadata_files)
+def test_rdf_string_native_writer(metadata_file):
+    metadata_file = os.path.join('data', 'metadata', metadata_file)
+    with open(metadata_file, 'r') as f:
+        md = load_rdf(f.read())
+    rdf_str = rdf_string(md, native=True)
+    assert isomorphic(Graph().parse(data=rdf_str, format='xml'), rdf_graph(md))
+    assert 'xmlns:hsterms="https://www.hydroshare.org/terms/"' in rdf_str
+    compare_metadatas(rdf_graph(load_rdf(rdf_str, native=True)), metadata_file)
+
+
+def test_native_writer_escapes_literals(res_md):
+    res_md.title = 'a < b & "c"\n  d'
+    res_md.additional_metadata = {"key": "<value attr='1'/>"}
+    rdf_str = rdf_string(res_md, native=True)
+    assert isomorphic(Graph().parse(data=rdf_str, format='xml'), rdf_graph(res_md))
+    assert load_rdf(rdf_str, native=True).title == res_md.title
+
+
+@pytest.mark.parametrize("metadata_file", metadata_files)
+def test_iter_triples(metadata_file):
+    with open(os.path.join('data', 'metadata', metadata_file), 'r') as f:
+        md = load_rdf(f.read())
+    triples = iter_triples(md)
+    assert isinstance(triples, types.GeneratorType)
+    graph = Graph()
+    for triple in triples:
+        graph.add(triple)
+    # the blank nodes of the two are labelled apart
+    assert isomorphic(graph, rdf_graph(md))
+
+
+def test_rdf_graph_maps_user_model_without_validation(monkeypatch, res_md):
+    expected = rdf_graph(res_md)
+
+    def validate(*args, **kwargs):
+        raise AssertionError("the RDF model was validated")
+
+    monkeypatch.setattr(ResourceMetadataInRDF, "__init__", validate)
+    monkeypatch.setattr(ResourceMetadataInRDF, "model_validate", validate)
+    assert isomorphic(rdf_graph(res_md), expected)
+
+
+def test_rdf_graph_numbers_new_creators(res_md):
+    res_md.creators.append(Creator(name="New Creator"))
+    loaded = load_rdf(rdf_string(res_md, native=True), native=True)
+    assert [creator.name for creator in loaded.creators] == [creator.name for creator in res_md.creators]
+    assert loaded.creators[-1].creator_order == len(res_md.creators)
+
+
+def test_rdf_graph_many():
+    mds = []
+    expected = Graph()
+    for metadata_file in ['resourcemetadata.xml', 'fileset_meta.xml', 'singlefile_meta.xml']:
+        with open(os.path.join('data', 'metadata', metadata_file), 'r') as f:
+            md = load_rdf(f.read())
+        mds.append(md)
+        expected += rdf_graph(md)
+    graph = Graph()
+    assert rdf_graph_many(mds, graph) is graph
+    assert isomorphic(graph, expected)
+    assert isomorphic(Graph().parse(data=rdf_string_many(mds, native=True), format='xml'), expected)
+    assert isomorphic(Graph().parse(data=rdf_string_many(mds), format='xml'), expected)
+
+
+def test_track_changes(res_md):
+    assert res_md.track_changes() is res_md
+    copied = res_md.model_copy(deep=True)
+    assert res_md == copied
+    rdf_graph(res_md)
+    assert res_md == copied
+    assert len(pickle.dumps(res_md)) == len(pickle.dumps(copied))
+
+
+def test_rdf_graph_regenerates_changed_fields(res_md_rdf):
+    md = load_rdf(res_md_rdf).track_changes()
+    graph = rdf_graph(md)
+    first, second = md.creators[0], md.creators[1]
+    first_subject = graph.value(predicate=HSTERMS.name, object=Literal(first.name))
+    second_subject = graph.value(predicate=HSTERMS.name, object=Literal(second.name))
+    assert first_subject is not None and second_subject is not None
+
+    md.subjects = md.subjects + ["added"]
+    first.name = "Changed, Name"
+    graph = rdf_graph(md)
+
+    expected = load_rdf(res_md_rdf)
+    expected.subjects = md.subjects
+    expected.creators[0].name = "Changed, Name"
+    assert isomorphic(graph, rdf_graph(expected))
+    # the unchanged creator reuses its triples, the changed one is regenerated
+    assert graph.value(predicate=HSTERMS.name, object=Literal(second.name)) == second_subject
+    assert graph.value(predicate=HSTERMS.name, object=Literal(first.name)) != first_subject
+
+
+def test_rdf_graph_regenerates_changes_made_in_place(res_md_rdf):
+    md = load_rdf(res_md_rdf).track_changes()
+    rdf_graph(md)
+
+    # neither change goes through an assignment on md
+    md.creators[0].name = "Changed, Name"
+    md.subjects.append("added")
+
+    expected = load_rdf(res_md_rdf)
+    expected.creators[0].name = "Changed, Name"
+    expected.subjects = expected.subjects + ["added"]
+    assert isomorphic(rdf_graph(md), rdf_graph(expected))
+
+
+@pytest.mark.parametrize("metadata_file", metadata_files)
+def test_rdf_string_canonical(metadata_file):
+    with open(os.path.join('data', 'metadata', metadata_file), 'r') as f:
+        rdf_str = f.read()
+    md = load_rdf(rdf_str)
+    nt = rdf_string(md, rdf_format='nt', canonical=True)
+    assert nt == rdf_string(load_rdf(rdf_str, native=True), rdf_format='nt', canonical=True)
+    assert isomorphic(Graph().parse(data=nt, format='nt'), rdf_graph(md))
+    xml = rdf_string(md, canonical=True)
+    assert xml == rdf_string(md, canonical=True)
+    assert isomorphic(Graph().parse(data=xml, format='xml'), rdf_graph(md))
+
+
+def test_canonical_triples_keeps_interchangeable_blank_nodes():
+    subject = URIRef("http://example.com/resource")
+    triples = []
+    for _ in range(2):
+        node = BNode()
+        triples += [(subject, DC.creator, node), (node, HSTERMS.name, Literal("same"))]
+    canonical = canonical_triples(triples)
+    assert len(canonical) == 4
+    assert canonical == canonical_triples(reversed(triples))
+    assert write_ntriples(canonical).count("\n") == 4
+
+
+def test_rdf_string_canonical_labels_minted_subjects():
+    def build():
+        return ResourceMap(
+            describes=FileMap(
+                is_documented_by="http://www.hydroshare.org/resource/abc/data/resourcemetadata.xml",
+                is_described_by="http://www.hydroshare.org/resource/abc/data/resourcemap.xml",
+                title="resource",
+            ),
+            identifier="abc",
+        )
+
+    first, second = build(), build()
+    assert first.rdf_subject != second.rdf_subject
+    for rdf_format in ('nt', 'xml'):
+        assert rdf_string(first, rdf_format=rdf_format, canonical=True) == rdf_string(
+            second, rdf_format=rdf_format, canonical=True
+        )
+    assert rdf_string(first.describes, rdf_format='nt', canonical=True) == rdf_string(
+        second.describes, rdf_format='nt', canonical=True
+    )
+    nt = rdf_string(first, rdf_format='nt', canonical=True)
+    assert str(first.rdf_subject) not in nt
+    assert len(Graph().parse(data=nt, format='nt')) == len(rdf_graph(first))
+    # a subject given to the model is kept
+    loaded = load_rdf(rdf_string(first))
+    assert str(loaded.rdf_subject) in rdf_string(loaded, rdf_format='nt', canonical=True)
+
+
+def test_rdf_string_canonical_unsupported_format(res_md):
+    with pytest.raises(Exception, match="Canonical serialization"):
+        rdf_string(res_md, rdf_format='turtle', canonical=True)
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {"rdf_format": "xml"},
+        {"rdf_format": "nt"},
+        {"native": True},
+        {"canonical": True},
+        {"rdf_format": "nt", "canonical": True},
+    ],
+)
+@pytest.mark.filterwarnings("error::UserWarning")
+def test_rdf_write(options):
+    with open(os.path.join('data', 'metadata', 'timeseries_meta.xml'), 'r') as f:
+        md = load_rdf(f.read())
+    fp = io.BytesIO()
+    assert rdf_write(md, fp, **options) is None
+    rdf_format = options.get("rdf_format", "pretty-xml")
+    parse_format = "xml" if rdf_format == "pretty-xml" else rdf_format
+    assert isomorphic(Graph().parse(data=fp.getvalue().decode('utf-8'), format=parse_format), rdf_graph(md))
+    if options.get("native") or options.get("canonical"):
+        assert fp.getvalue().decode('utf-8') == rdf_string(md, **options)
+
+
+def test_write_lines_from_generator():
+    fp = io.BytesIO()
+    write_lines(fp, ("line {}".format(index) for index in range(5)), chunk_size=2)
+    assert fp.getvalue() == "".join("line {}\n".format(index) for index in range(5)).encode("utf-8")
+
+
+def _bag_models():
+    models = []
+    for metadata_file in ['resourcemetadata.xml', 'singlefile_meta.xml', 'fileset_meta.xml']:
+        with open(os.path.join('data', 'metadata', metadata_file), 'r') as f:
+            models.append(load_rdf(f.read()))
+    resource_map = ResourceMap(
+        describes=FileMap(
+            is_documented_by="http://www.hydroshare.org/resource/abc/data/resourcemetadata.xml",
+            is_described_by="http://www.hydroshare.org/resource/abc/data/resourcemap.xml",
+            title="resource",
+        ),
+    )
+    aggregation_map = ResourceMap(
+        describes=FileMap(
+            is_documented_by="http://www.hydroshare.org/resource/abc/data/contents/test_meta.xml",
+            is_described_by="http://www.hydroshare.org/resource/abc/data/contents/test_resmap.xml",
+            title="test",
+        ),
+    )
+    return models[0], resource_map, [(models[1], aggregation_map), models[2]]
+
+
+def test_bag_files():
+    resource, resource_map, aggregations = _bag_models()
+    files = bag_files(resource, resource_map, aggregations)
+    assert [path for path, model in files] == [
+        "data/resourcemetadata.xml",
+        "data/resourcemap.xml",
+        "data/contents/test_meta.xml",
+        "data/contents/test_resmap.xml",
+        "data/contents/asdf/asdf_meta.xml",
+    ]
+    assert files[2][1] is aggregations[0][0]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_export_bag(tmp_path, workers):
+    resource, resource_map, aggregations = _bag_models()
+    exported = export_bag(str(tmp_path), resource, resource_map, aggregations, workers=workers, native=True)
+    assert [file.path for file in exported] == [path for path, model in bag_files(resource, resource_map, aggregations)]
+    for file, (path, model) in zip(exported, bag_files(resource, resource_map, aggregations)):
+        assert isinstance(file, ExportedFile)
+        full_path = tmp_path.joinpath(*path.split("/"))
+        assert file.size == full_path.stat().st_size
+        assert file.seconds > 0
+        with open(full_path, 'r') as f:
+            assert isomorphic(Graph().parse(data=f.read(), format='xml'), rdf_graph(model))
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+@pytest.mark.parametrize("umask", [0o022, 0o027])
+def test_export_bag_file_mode(tmp_path, umask):
+    resource, resource_map, aggregations = _bag_models()
+    previous = os.umask(umask)
+    try:
+        exported = export_bag(str(tmp_path), resource, resource_map, aggregations)
+    finally:
+        os.umask(previous)
+    for file in exported:
+        mode = tmp_path.joinpath(*file.path.split("/")).stat().st_mode & 0o777
+        assert mode == 0o666 & ~umask
+
+
+def _jsonld_graph(document):
+    # reads back the JSON-LD jsonld_document writes, compact IRIs, embedded nodes and @value objects
+    context = document["@context"]
+    graph = Graph()
+    blank_nodes = {}
+
+    def expand(iri):
+        prefix, _, local = iri.partition(":")
+        return URIRef(context[prefix] + local) if prefix in context else URIRef(iri)
+
+    def identifier(node_id):
+        if node_id is None:
+            return BNode()
+        if node_id.startswith("_:"):
+            return blank_nodes.setdefault(node_id, BNode())
+        return URIRef(node_id)
+
+    def read_node(node):
+        subject = identifier(node.get("@id"))
+        for key, values in node.items():
+            if key in ("@context", "@id", "@graph"):
+                continue
+            for value in values if isinstance(values, list) else [values]:
+                if key == "@type":
+                    graph.add((subject, RDF.type, expand(value)))
+                else:
+                    graph.add((subject, expand(key), read_value(value)))
+        return subject
+
+    def read_value(value):
+        if not isinstance(value, dict):
+            return Literal(value)
+        if "@value" in value:
+            datatype = expand(value["@type"]) if "@type" in value else None
+            return Literal(value["@value"], lang=value.get("@language"), datatype=datatype)
+        if list(value) == ["@id"]:
+            return identifier(value["@id"])
+        return read_node(value)
+
+    for node in document.get("@graph", [document]):
+        read_node(node)
+    return graph
+
+
+@pytest.mark.parametrize("metadata_file", metadata_files)
+def test_jsonld_document(metadata_file):
+    with open(os.path.join('data', 'metadata', metadata_file), 'r') as f:
+        md = load_rdf(f.read())
+    document = jsonld_document(md)
+    assert document["@context"]["hsterms"] == str(HSTERMS)
+    assert isomorphic(_jsonld_graph(document), rdf_graph(md))
+    assert json.loads(jsonld_string(md)) == json.loads(json.dumps(document))
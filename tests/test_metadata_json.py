@@ -5,6 +5,7 @@ import pytest
 
 from pydantic import ValidationError
 
+from hsmodels.schemas import validate_many
 from hsmodels.schemas.aggregations import (
     FileSetMetadataIn,
     GeographicFeatureMetadataIn,
@@ -239,3 +240,53 @@ def test_delimiter_csvfile_aggr_readonly():
         md = CSVFileMetadataIn(**json.loads(f.read()))
         with pytest.raises(ValidationError):
             md.tableSchema.delimiter = ";"
+
+
+@pytest.mark.parametrize("metadata_json_input", metadata_json_input)
+def test_validate_many(metadata_json_input):
+    in_schema, jsonfile = metadata_json_input
+    with open(os.path.join('data', 'json', jsonfile), 'r') as f:
+        record = json.loads(f.read())
+    records = [record, dict(record, title=None), record]
+    recorded = json.dumps(records)
+
+    for report in (validate_many(in_schema, records), validate_many(in_schema, recorded)):
+        assert report.models[0] == in_schema(**record)
+        assert report.models[1] is None
+        assert report.models[2] == report.models[0]
+        assert list(report.errors) == [1]
+        assert [(error["loc"], error["type"]) for error in report.errors[1]] == [(("title",), "string_type")]
+    # the records are copied before the root validators change them
+    assert json.dumps(records) == recorded
+
+
+def test_validate_many_reports_errors_by_index():
+    with open(os.path.join('data', 'json', 'resource.json'), 'r') as f:
+        record = json.loads(f.read())
+    records = [dict(record, title=None), record, record, dict(record, subjects=None, title=None)]
+    report = validate_many(ResourceMetadataIn, records)
+    assert [model is None for model in report.models] == [True, False, False, True]
+    assert {index: [error["loc"] for error in errors] for index, errors in report.errors.items()} == {
+        0: [("title",)],
+        3: [("title",), ("subjects",)],
+    }
+
+
+def test_validate_many_reports_exceptions():
+    with open(os.path.join('data', 'json', 'resource.json'), 'r') as f:
+        record = json.loads(f.read())
+    report = validate_many(ResourceMetadataIn, [5, record, dict(record, coverages=5)])
+    assert report.models[1] == ResourceMetadataIn(**record)
+    assert report.models[0] is None and report.models[2] is None
+    assert [error["type"] for error in report.errors[0]] == ["TypeError"]
+    assert [error["type"] for error in report.errors[2]] == ["TypeError"]
+
+    report = validate_many(ResourceMetadataIn, json.dumps([None, record]))
+    assert report.models[0] is None
+    assert report.models[1] == ResourceMetadataIn(**record)
+    assert list(report.errors) == [0]
+
+
+def test_validate_many_not_a_list():
+    with pytest.raises(ValidationError):
+        validate_many(ResourceMetadataIn, '{"title": "title"}')
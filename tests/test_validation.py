@@ -5,10 +5,20 @@ from pydantic import ValidationError
 
 from hsmodels.namespaces import DCTERMS
 from hsmodels.schemas import GeographicRasterMetadata, load_rdf
-from hsmodels.schemas.enums import AggregationType, DateType, VariableType
-from hsmodels.schemas.fields import BoxCoverage, Contributor, Creator, PeriodCoverage, Rights, Variable
-from hsmodels.schemas.rdf.fields import DateInRDF, ExtendedMetadataInRDF
+from hsmodels.schemas.enums import (
+    AggregationType,
+    CoverageType,
+    DateType,
+    RelationType,
+    UserIdentifierType,
+    VariableType,
+)
+from hsmodels.schemas.fields import BoxCoverage, Contributor, Creator, PeriodCoverage, Relation, Rights, Variable
+from hsmodels.schemas.rdf.aggregations import SingleFileMetadataInRDF
+from hsmodels.schemas.rdf.fields import CoverageInRDF, CreatorInRDF, DateInRDF, ExtendedMetadataInRDF
+from hsmodels.schemas.rdf.validators import coverages_constraint, dates_constraint, sort_creators
 from hsmodels.schemas.resource import ResourceMetadata
+from hsmodels.schemas.vocabulary import vocabulary
 
 
 @pytest.fixture()
@@ -31,6 +41,99 @@ def test_resource_metadata_language(res_md):
         assert "language 'badcode' must be a 3 letter iso language code" in str(ve)
 
 
+def test_vocabulary():
+    assert vocabulary() is vocabulary()
+    assert vocabulary().language_names["eng"] == "English"
+    assert vocabulary().language_codes["English"] == "eng"
+    assert vocabulary().relation_types.by_value[RelationType.hasPart.value] is RelationType.hasPart
+    assert vocabulary().date_fields[str(DCTERMS.created)] == "created"
+    with pytest.raises(TypeError):
+        vocabulary().language_names["xxx"] = "Unknown"
+
+
+def test_vocabulary_keeps_enum_order():
+    relation = Relation(isReplacedBy="https://www.google.com/", isPartOf="https://sadf.com")
+    assert relation.type == RelationType.isPartOf
+    creator = Creator(name="name", ORCID="https://orcid.org/0000", google_scholar_id="https://scholar.google.com/0000")
+    assert list(creator.identifiers) == [UserIdentifierType.google_scholar_id, UserIdentifierType.ORCID]
+
+
+def test_batch_edit(res_md):
+    with res_md.batch_edit():
+        res_md.title = "new title"
+        res_md.language = "fre"
+        res_md.subjects = ["a", " a", "b "]
+        assert res_md.subjects == ["a", " a", "b "]
+    assert res_md.title == "new title"
+    assert res_md.language == "fre"
+    assert res_md.subjects == ["a", "b"]
+
+
+def test_batch_edit_errors(res_md):
+    title = res_md.title
+    with pytest.raises(ValidationError, match="language 'badcode' must be a 3 letter iso language code"):
+        with res_md.batch_edit():
+            res_md.title = "new title"
+            with res_md.batch_edit():
+                res_md.language = "badcode"
+            assert res_md.language == "badcode"
+    assert res_md.title == title
+    assert res_md.language == "eng"
+
+    with pytest.raises(ValidationError, match="subjects"):
+        with res_md.batch_edit():
+            res_md.subjects.append(5)
+    res_md.subjects.pop()
+
+    with pytest.raises(ValidationError, match="Field is frozen"):
+        with res_md.batch_edit():
+            res_md.created = datetime.now()
+    res_md.title = "validated again"
+
+
+def test_apply_patch(res_md):
+    patched = res_md.apply_patch(
+        {
+            "subjects": ["x", " x", "y"],
+            "additional_metadata": [{"key": "a", "value": "b"}],
+            "coverages": [{"type": str(DCTERMS.period), "value": "start=2020-01-01; end=2021-01-01"}],
+        }
+    )
+    assert patched.subjects == ["x", "y"]
+    assert patched.additional_metadata == dict(res_md.additional_metadata, a="b")
+    assert patched.period_coverage.start == datetime(2020, 1, 1)
+    assert patched.creators is res_md.creators
+    assert patched.spatial_coverage is res_md.spatial_coverage
+    assert res_md.subjects != patched.subjects
+    assert patched == ResourceMetadata.model_validate(dict(res_md.model_dump(), **patched.model_dump()))
+
+
+def test_apply_patch_merges_additional_metadata(res_md):
+    assert res_md.additional_metadata
+    patched = res_md.apply_patch({"additional_metadata": {"new": "v"}})
+    assert patched.additional_metadata == dict(res_md.additional_metadata, new="v")
+    assert "new" not in res_md.additional_metadata
+    replaced = next(iter(res_md.additional_metadata))
+    patched = res_md.apply_patch({"additional_metadata": {replaced: "changed"}})
+    assert patched.additional_metadata == dict(res_md.additional_metadata, **{replaced: "changed"})
+
+
+def test_apply_patch_keeps_derived_fields(change_test_dir):
+    with open("data/metadata/modelprogram_meta.xml", 'r') as f:
+        md = load_rdf(f.read())
+    assert md.file_types
+    assert md.apply_patch({"title": "new title"}).file_types == md.file_types
+
+
+def test_apply_patch_errors(res_md):
+    with pytest.raises(ValidationError) as e:
+        res_md.apply_patch(
+            {"language": "badcode", "created": datetime.now(), "creators": [{"name": "a", "email": "a"}]}
+        )
+    assert [error["loc"] for error in e.value.errors()] == [("language",), ("created",), ("creators", 0, "email")]
+    assert "language 'badcode' must be a 3 letter iso language code" in str(e.value)
+
+
 def test_extended_metadata():
     em = ExtendedMetadataInRDF(key='key1', value='value1')
     assert em.key == 'key1'
@@ -54,6 +157,38 @@ def test_dates():
         assert "2 validation errors for Date" in str(ve)
 
 
+def test_dates_constraint():
+    now = datetime.now()
+    created = DateInRDF(type=DateType.created, value=now)
+    modified = DateInRDF(type=DateType.modified, value=now + timedelta(days=1))
+    assert dates_constraint(None, [modified, created]) == [modified, created]
+    with pytest.raises(AssertionError):
+        dates_constraint(None, [created, created])
+    with pytest.raises(AssertionError):
+        dates_constraint(None, [created, DateInRDF(type=DateType.modified, value=now - timedelta(days=1))])
+
+
+def test_coverages_constraint():
+    point = CoverageInRDF(type=CoverageType.point, value="east=1; north=1")
+    box = CoverageInRDF(type=CoverageType.box, value="northlimit=1; eastlimit=1; southlimit=0; westlimit=0")
+    assert coverages_constraint(None, [point]) == [point]
+    with pytest.raises(AssertionError):
+        coverages_constraint(None, [point, point])
+    with pytest.raises(AssertionError, match="Only one type of spatial coverage is allowed"):
+        coverages_constraint(None, [point, box])
+    # aggregations are not constrained
+    assert SingleFileMetadataInRDF(title="title", coverages=[point, box]).coverages == [point, box]
+
+
+def test_sort_creators():
+    creators = [
+        CreatorInRDF(name="c"),
+        CreatorInRDF(name="b", creator_order=3),
+        CreatorInRDF(name="a", creator_order=1),
+    ]
+    assert [(c.name, c.creator_order) for c in sort_creators(None, creators)] == [("a", 1), ("b", 3), ("c", 4)]
+
+
 def test_variables():
     variable = Variable(
         name="name",